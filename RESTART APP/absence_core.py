@@ -0,0 +1,195 @@
+import argparse
+import queue
+import sys
+import pandas as pd
+from absence_schema import CATEGORY_MAPPING, REQUIRED_COLUMNS, UNKNOWN_CATEGORY, parse_dates, to_typed
+from data_store import AGGREGATES, KEY_COLUMNS, AbsenceStore
+from excel_ingest import read_workbooks
+from send_pipeline import add_week_column
+
+
+def read_absences(file_paths, log=print):
+    """Read absence exports (CSV files, or every sheet of Excel workbooks) and add the Week column.
+
+    Raises ValueError if no file has the required columns.
+    """
+    frames = []
+    workbooks = [path for path in file_paths if not path.lower().endswith(".csv")]
+    for path in file_paths:
+        if path.lower().endswith(".csv"):
+            data = pd.read_csv(path)
+            missing = REQUIRED_COLUMNS - set(data.columns)
+            if missing:
+                log(f">> Skipped {path}: Missing columns: {', '.join(sorted(missing))}")
+            else:
+                frames.append(data)
+    if workbooks:
+        frames.append(read_workbooks(workbooks, log))
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        raise ValueError("No file with the required columns.")
+    return add_week_column(pd.concat(frames, ignore_index=True))
+
+
+def categorize(data, mapping=CATEGORY_MAPPING):
+    """Return the Category of each row of a typed frame, derived from its Justificative.
+
+    Rows without a Justificative get no Category; unmapped ones get UNKNOWN_CATEGORY.
+    """
+    justificative = data["Justificative"].astype(object)
+    category = justificative.map(mapping)
+    category = category.where(category.notna() | justificative.isna(), UNKNOWN_CATEGORY)
+    return category.astype("category")
+
+
+def known_changes(store, new_data, keys):
+    """Return {record key: {column: value}} for the fields re-imported rows bring to their stored records.
+
+    `keys` gives the matching stored record of each row (None for new rows).
+    Only non-empty values that differ from the stored ones count, so a send
+    retried after a failed attempt records its Date of Send while an older
+    export never clears a response.
+    """
+    matched = [position for position, key in enumerate(keys) if key is not None]
+    if not matched:
+        return {}
+    columns = [col for col in new_data.columns if col not in store.dedup_columns and col not in KEY_COLUMNS]
+    incoming = new_data.iloc[matched][columns].astype(object)
+    incoming.index = [keys[position] for position in matched]
+    stored = store.records(list(dict.fromkeys(incoming.index)))[columns].astype(object).reindex(incoming.index)
+    differs = (incoming.notna() & ~(incoming == stored)).to_numpy()
+
+    changes = {}
+    for key, values, mask in zip(incoming.index, incoming.itertuples(index=False, name=None), differs):
+        values = {column: value for column, value, changed in zip(columns, values, mask) if changed}
+        if values:
+            changes.setdefault(key, {}).update(values)
+    return changes
+
+
+def merge_records(store, new_data):
+    """Categorize a batch, update the records it repeats and append the rest; returns the new rows.
+
+    Known rows are found by the store's fingerprints of its dedup columns,
+    so the cost follows the batch size rather than the history.
+    """
+    new_data = to_typed(new_data)
+    new_data["Category"] = categorize(new_data)
+    matches = store.match_rows(new_data)
+    changes = known_changes(store, new_data, matches[1])
+    if changes:
+        store.update_rows(changes)
+    new_data = new_data[store.new_rows(new_data, matches)]
+    new_data.index = store.append(new_data)
+    return new_data
+
+
+def response_changes(date_response, justificative):
+    """Return the column changes that record an employee's response.
+
+    Raises ValueError if the date cannot be read.
+    """
+    if parse_dates([date_response]).isna()[0]:
+        raise ValueError("Date of Response must be a date (YYYY-MM-DD).")
+    return {
+        "Date of Response": date_response,
+        "Justificative": justificative,
+        "Category": CATEGORY_MAPPING.get(justificative, UNKNOWN_CATEGORY),
+    }
+
+
+def recategorize(store):
+    """Rewrite Category wherever it disagrees with the Justificative; returns the number of records changed."""
+    data = store.frame()
+    expected = categorize(data).astype(object)
+    current = data["Category"].astype(object)
+    same = (expected == current) | (expected.isna() & current.isna())
+    stale = data.index[data["Justificative"].notna() & ~same]
+    if len(stale):
+        store.update_rows({key: {"Category": expected[key]} for key in stale})
+    return len(stale)
+
+
+def report(store, kind):
+    """Return the stored counts for one summary (see AGGREGATES)."""
+    return store.aggregate(kind)
+
+
+def send_files(file_paths, subject, body_template, transport, concurrency=4, digest=False, log=print):
+    """Send a batch like the Send Email page does; returns the sent data, or None on failure."""
+    from send_pipeline import SendJob
+
+    job = SendJob(file_paths, subject, body_template, transport, concurrency=concurrency, digest=digest)
+    job.start()
+    while True:
+        try:
+            event = job.events.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        except KeyboardInterrupt:
+            job.cancel()
+            continue
+        if event[0] == "log":
+            log(event[1])
+        elif event[0] == "done":
+            return event[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process absence records without the GUI")
+    parser.add_argument("--db", default="saved_data.db", help="SQLite store (created from saved_data.csv if empty)")
+    parser.add_argument("--dedup-columns", help="comma-separated columns identifying a duplicate row; saved in the store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="add the new rows of Excel/CSV exports to the store")
+    ingest.add_argument("files", nargs="+")
+
+    commands.add_parser("categorize", help="recompute Category from Justificative for every record")
+
+    summary = commands.add_parser("report", help="print record counts")
+    summary.add_argument("--by", choices=list(AGGREGATES), default="category")
+
+    kpis = commands.add_parser("kpis", help="print the weekly KPIs computed from the records")
+    kpis.add_argument("--export", help="also write them to an output.json or .xlsx file")
+
+    send = commands.add_parser("send", help="send the emails for Excel exports, then ingest them")
+    send.add_argument("files", nargs="+")
+    send.add_argument("--subject", default="Absence {dates}")
+    send.add_argument("--body", default="Bonjour {name},\n\nVotre absence a été notée pour les dates suivantes : {dates}.")
+    send.add_argument("--transport", default="Fake", help="Outlook, SMTP or Fake")
+    send.add_argument("--concurrency", type=int, default=4)
+    send.add_argument("--digest", action="store_true", help="one email per employee")
+    args = parser.parse_args(argv)
+
+    dedup_columns = args.dedup_columns.split(",") if args.dedup_columns else None
+    store = AbsenceStore(args.db, dedup_columns=dedup_columns)
+    try:
+        if args.command == "ingest":
+            added = merge_records(store, read_absences(args.files))
+            print(f">> {len(added)} new records, {store.count()} in total.")
+        elif args.command == "categorize":
+            print(f">> {recategorize(store)} records recategorized.")
+        elif args.command == "report":
+            print(report(store, args.by).to_string(index=False))
+        elif args.command == "kpis":
+            from kpi_engine import WeeklyKPIEngine
+
+            engine = WeeklyKPIEngine(store)
+            data = engine.export(args.export) if args.export else engine.weekly()
+            print(data.to_string(index=False))
+        elif args.command == "send":
+            from mail_transport import create_transport
+
+            transport = create_transport(args.transport, pool_size=args.concurrency)
+            data = send_files(args.files, args.subject, args.body, transport, args.concurrency, args.digest)
+            if data is None:
+                return 1
+            added = merge_records(store, data)
+            print(f">> {len(added)} new records, {store.count()} in total.")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import pandas as pd
+
+# Columns persisted for every absence record, in display order
+COLUMNS = [
+    "Dates of Absences",
+    "Name",
+    "Email Name",
+    "Manager",
+    "Email Manager",
+    "Week",
+    "Date of Send",
+    "Date of Response",
+    "Category",
+    "Justificative",
+]
+
+# Columns every uploaded absence export must have
+REQUIRED_COLUMNS = {"Name", "Email Name", "Dates of Absences", "Email Manager"}
+
+# Repetitive text columns held as pandas categoricals in memory
+CATEGORY_COLUMNS = ["Name", "Email Name", "Manager", "Email Manager", "Category", "Justificative"]
+
+# Columns held as datetime64 in memory and as DATE_FORMAT strings in the store
+DATE_COLUMNS = ["Dates of Absences", "Date of Send", "Date of Response"]
+DATE_FORMAT = "%Y-%m-%d"
+
+# Justificative to Category Mapping
+CATEGORY_MAPPING = {
+    "Absence pour raisons de santé": "Absence",
+    "Mise à jour manquante": "Mise à jour planning",
+    "Autorisation du responsable direct": "Mise à jour planning",
+    "Congé planifié": "Mise à jour planning",
+    "Décalage de planning": "A verifier",
+    "Absence excepionnelle non prévu": "Absence",
+    "Intervention chez un client/autre emplacement": "Mise à jour planning",
+    "Probléme de badge d'accès": "A verifier",
+    "Attente d'information": "Attente d'information",
+    "Démission": "Mise à jour planning"
+}
+
+# Category of a Justificative missing from the mapping
+UNKNOWN_CATEGORY = "Unknown"
+
+
+def parse_dates(values):
+    """Parse dates given as strings, datetimes or Excel cells; unreadable values become NaT."""
+    return pd.to_datetime(values, errors="coerce", format="mixed")
+
+
+def to_typed(data):
+    """Return `data` in COLUMNS order with categorical text, datetime64 dates and a nullable Week."""
+    data = data.reindex(columns=COLUMNS)
+    converted = {col: parse_dates(data[col]) for col in DATE_COLUMNS}
+    converted.update({col: data[col].astype("category") for col in CATEGORY_COLUMNS})
+    converted["Week"] = pd.to_numeric(data["Week"], errors="coerce").astype("Int64")
+    return data.assign(**converted)
+
+
+def empty_frame():
+    return to_typed(pd.DataFrame(columns=COLUMNS))
+
+
+def concat_typed(frames, **kwargs):
+    """Concatenate typed frames, merging categories so the columns stay categorical."""
+    frames = [frame for frame in frames if frame is not None]
+    dtypes = {}
+    for col in CATEGORY_COLUMNS:
+        categories = frames[0][col].cat.categories
+        for frame in frames[1:]:
+            categories = categories.append(frame[col].cat.categories.difference(categories))
+        dtypes[col] = pd.CategoricalDtype(categories)
+    return pd.concat([frame.astype(dtypes) for frame in frames], **kwargs)
+
+
+def set_value(data, position, column, value):
+    """Set one cell of a typed frame, parsing dates and adding unseen categories."""
+    if column in DATE_COLUMNS:
+        value = parse_dates(pd.Series([value])).iloc[0]
+    elif column in CATEGORY_COLUMNS and pd.notna(value) and value not in data[column].cat.categories:
+        data[column] = data[column].cat.add_categories([value])
+    data.iat[position, data.columns.get_loc(column)] = value
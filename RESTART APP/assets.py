@@ -0,0 +1,57 @@
+import glob
+import os
+import customtkinter as ctk
+from PIL import Image
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_images")
+CACHE_DIR = os.path.join(IMAGE_DIR, ".cache")
+
+# Variants are stored at twice the display size so they stay sharp on HiDPI screens
+CACHE_SCALE = 2
+
+_scaled = {}  # (file name, size) -> decoded PIL image
+_images = {}  # (light file, dark file, size) -> shared CTkImage
+
+
+def load_scaled(file_name, size):
+    """Return an image from test_images resized for `size`, decoding it at most once.
+
+    Resized variants are kept in test_images/.cache, named after the source
+    file's mtime and size so an edited image is picked up automatically.
+    """
+    if (file_name, size) in _scaled:
+        return _scaled[(file_name, size)]
+
+    source = os.path.join(IMAGE_DIR, file_name)
+    stat = os.stat(source)
+    stem = os.path.splitext(file_name)[0]
+    width, height = size[0] * CACHE_SCALE, size[1] * CACHE_SCALE
+    prefix = os.path.join(CACHE_DIR, f"{stem}_{width}x{height}_")
+    cache_file = f"{prefix}{stat.st_mtime_ns}_{stat.st_size}.png"
+
+    if os.path.exists(cache_file):
+        image = Image.open(cache_file)
+        image.load()
+    else:
+        with Image.open(source) as original:
+            image = original.resize((width, height), Image.LANCZOS)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for stale in glob.glob(glob.escape(prefix) + "*.png"):
+                os.remove(stale)
+            image.save(cache_file)
+        except OSError:
+            pass  # A read-only install just skips the disk cache
+
+    _scaled[(file_name, size)] = image
+    return image
+
+
+def get_image(light, dark=None, size=(20, 20)):
+    """Return the shared CTkImage for a light/dark pair of files at `size`."""
+    key = (light, dark or light, size)
+    if key not in _images:
+        light_image = load_scaled(light, size)
+        dark_image = load_scaled(dark, size) if dark else light_image
+        _images[key] = ctk.CTkImage(light_image=light_image, dark_image=dark_image, size=size)
+    return _images[key]
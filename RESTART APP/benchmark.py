@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from absence_core import merge_records
+from data_store import AGGREGATES, AbsenceStore
+from kpi_data import load_weekly_kpis
+from kpi_engine import WeeklyKPIEngine
+from mail_transport import FakeTransport
+from send_pipeline import SendJob
+from synthetic_data import write_dataset
+
+
+class Benchmark:
+    """Time and peak Python memory of each stage on one generated dataset.
+
+    Every stage is a (setup, run) pair. Setup builds fresh state in a
+    scratch directory and is not measured. Each stage runs `repeat` times
+    for the best time, then once more under tracemalloc for the peak
+    memory, because tracing slows the code down too much to time it.
+    """
+
+    def __init__(self, rows, workdir, repeat=3, seed=0):
+        self.rows = rows
+        self.workdir = workdir
+        self.repeat = repeat
+        self.paths = write_dataset(os.path.join(workdir, "data"), rows, seed)
+        self.history_db = os.path.join(workdir, "history.db")
+        store = AbsenceStore(self.history_db, self.paths["history"])
+        store.close()
+        self.new_data = pd.read_excel(self.paths["new"])
+
+    def scratch(self):
+        """Return an empty scratch directory for one run."""
+        directory = os.path.join(self.workdir, "run")
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        return directory
+
+    def copy_store(self):
+        db_file = os.path.join(self.scratch(), "saved_data.db")
+        shutil.copy(self.history_db, db_file)
+        return AbsenceStore(db_file, legacy_csv=None)
+
+    # Stages: each setup returns the argument passed to its run function
+
+    def setup_import(self):
+        return os.path.join(self.scratch(), "saved_data.db")
+
+    def run_import(self, db_file):
+        AbsenceStore(db_file, self.paths["history"]).close()
+
+    def run_load(self, store):
+        store.frame()
+
+    def setup_update(self):
+        store = self.copy_store()
+        store.frame()  # the Analysis page has the records loaded already
+        return store
+
+    def run_update(self, store):
+        merge_records(store, self.new_data)
+
+    def run_dashboard(self, store):
+        for kind in AGGREGATES:
+            store.aggregate(kind)
+
+    def setup_home_cold(self):
+        return os.path.join(self.scratch(), ".cache")
+
+    def setup_home_cached(self):
+        cache_dir = self.setup_home_cold()
+        load_weekly_kpis(self.paths["kpis"], cache_dir)
+        return cache_dir
+
+    def run_home(self, cache_dir):
+        load_weekly_kpis(self.paths["kpis"], cache_dir)
+
+    def run_engine(self, store):
+        WeeklyKPIEngine(store).weekly()  # every week is dirty in a fresh copy
+
+    def setup_send(self):
+        return SendJob(self.paths["new"], "Absence on {dates}", "Hello {name}, please justify {dates}.",
+                       FakeTransport(), concurrency=4)
+
+    def run_send(self, job):
+        job.run()
+        assert job.transport.sent == self.rows, "not every email was sent"
+
+    def stages(self):
+        return {
+            "store import (csv)": (self.setup_import, self.run_import),
+            "analysis load": (self.copy_store, self.run_load),
+            "analysis merge": (self.setup_update, self.run_update),
+            "dashboard aggregates": (self.copy_store, self.run_dashboard),
+            "home kpis (cold)": (self.setup_home_cold, self.run_home),
+            "home kpis (cached)": (self.setup_home_cached, self.run_home),
+            "home kpis (records)": (self.copy_store, self.run_engine),
+            "send (fake transport)": (self.setup_send, self.run_send),
+        }
+
+    def measure(self, setup, run):
+        best = float("inf")
+        for _ in range(self.repeat):
+            argument = setup()
+            started = time.perf_counter()
+            run(argument)
+            best = min(best, time.perf_counter() - started)
+            self.release(argument)
+
+        argument = setup()
+        tracemalloc.start()
+        try:
+            run(argument)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            self.release(argument)
+        return best, peak
+
+    def release(self, argument):
+        if isinstance(argument, AbsenceStore):
+            argument.close()
+
+    def run(self, selected=None):
+        results = []
+        for name, (setup, run) in self.stages().items():
+            if selected and not any(word in name for word in selected):
+                continue
+            seconds, peak = self.measure(setup, run)
+            results.append({"stage": name, "rows": self.rows, "seconds": seconds, "peak_mb": peak / 2**20})
+            print(f"{name:<24}{self.rows:>10,}{seconds * 1000:12.1f} ms{peak / 2**20:10.1f} MB", flush=True)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the data paths of the app on synthetic data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--stage", nargs="*", help="only run stages whose name contains one of these words")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    print(f"{'stage':<24}{'rows':>10}{'best time':>15}{'peak':>10}")
+    results = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            results += Benchmark(rows, workdir, args.repeat).run(args.stage)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,104 @@
+import numpy as np
+from can_buffer import SIGNAL_NAMES
+
+# Reason bits reported for each frame
+ABOVE_MAX = 1
+RATE_OF_CHANGE = 2
+Z_SCORE = 4
+STUCK = 8
+REASON_NAMES = {ABOVE_MAX: "max", RATE_OF_CHANGE: "rate", Z_SCORE: "z-score", STUCK: "stuck"}
+
+# Per-signal rules; None disables a check
+DEFAULT_RULES = {
+    "Engine Speed": {"max": 4000, "max_rate": 20000, "window": 50, "z_limit": 4.0, "stuck_count": 20},
+    "Temperature": {"max": 100, "max_rate": 50, "window": 50, "z_limit": 4.0, "stuck_count": 50},
+    "Vehicle Speed": {"max": 120, "max_rate": 500, "window": 50, "z_limit": 4.0, "stuck_count": 20},
+}
+
+
+def reason_text(reasons):
+    """Describe a reason bitmask, e.g. 'max, z-score'."""
+    return ", ".join(name for bit, name in REASON_NAMES.items() if reasons & bit)
+
+
+class SignalState:
+    """What one signal's rules need to remember between batches."""
+
+    def __init__(self):
+        self.last_value = None
+        self.last_time = None
+        self.run_length = 0  # consecutive samples equal to last_value
+        self.tail = np.empty(0)  # last `window` values for the rolling statistics
+
+
+class AnomalyEngine:
+    """Evaluate threshold, rate-of-change, rolling z-score and stuck-value rules.
+
+    Frames are evaluated a batch at a time with array operations per signal;
+    the only per-signal state carried between batches is the previous
+    sample, the current run length and the rolling window tail, so the cost
+    is independent of how long the logger has been running.
+    """
+
+    def __init__(self, rules=None):
+        rules = DEFAULT_RULES if rules is None else rules
+        self.rules = {SIGNAL_NAMES.index(name): rule for name, rule in rules.items()}
+        self.states = {code: SignalState() for code in self.rules}
+
+    def evaluate(self, frames):
+        """Set frames["warning"] in place and return the reason bitmask per frame."""
+        reasons = np.zeros(len(frames), dtype=np.uint8)
+        for code, rule in self.rules.items():
+            positions = np.flatnonzero(frames["signal"] == code)
+            if len(positions):
+                values = frames["value"][positions].astype(np.float64)
+                times = frames["timestamp"][positions]
+                reasons[positions] = self.evaluate_signal(rule, self.states[code], values, times)
+        frames["warning"] = reasons != 0
+        return reasons
+
+    def evaluate_signal(self, rule, state, values, times):
+        count = len(values)
+        reasons = np.zeros(count, dtype=np.uint8)
+
+        if rule.get("max") is not None:
+            reasons[values > rule["max"]] |= ABOVE_MAX
+
+        # Previous sample for every value, carrying the last one from the previous batch
+        has_previous = state.last_value is not None
+        previous = np.concatenate(([state.last_value if has_previous else np.nan], values[:-1]))
+        previous_times = np.concatenate(([state.last_time if has_previous else times[0]], times[:-1]))
+
+        if rule.get("max_rate") is not None:
+            seconds = (times - previous_times) / 1e9
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rate = np.abs(values - previous) / seconds
+            reasons[(seconds > 0) & (rate > rule["max_rate"])] |= RATE_OF_CHANGE
+
+        if rule.get("stuck_count"):
+            # Run length of equal values, continuing the run from the previous batch
+            index = np.arange(count)
+            run_starts = np.maximum.accumulate(np.where(values != previous, index, -1))
+            runs = np.where(run_starts >= 0, index - run_starts + 1, state.run_length + index + 1)
+            reasons[runs >= rule["stuck_count"]] |= STUCK
+            state.run_length = int(runs[-1])
+
+        window = rule.get("window")
+        if window and rule.get("z_limit") is not None:
+            # Mean and deviation of the `window` samples before each value, from prefix sums
+            extended = np.concatenate((state.tail, values))
+            sums = np.concatenate(([0.0], np.cumsum(extended)))
+            squares = np.concatenate(([0.0], np.cumsum(extended ** 2)))
+            end = np.arange(len(state.tail), len(extended))
+            start = np.maximum(0, end - window)
+            size = end - start
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = (sums[end] - sums[start]) / size
+                std = np.sqrt(np.maximum((squares[end] - squares[start]) / size - mean ** 2, 0))
+                outlier = np.abs(values - mean) > rule["z_limit"] * std
+            reasons[(size >= window) & (std > 0) & outlier] |= Z_SCORE
+            state.tail = extended[-window:]
+
+        state.last_value = values[-1]
+        state.last_time = times[-1]
+        return reasons
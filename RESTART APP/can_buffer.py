@@ -0,0 +1,121 @@
+from datetime import datetime
+import threading
+import numpy as np
+import pandas as pd
+
+# Signals known to the logger; a frame stores the position in these lists
+SIGNAL_NAMES = ["Engine Speed", "Temperature", "Vehicle Speed"]
+SIGNAL_IDS = [0x100, 0x101, 0x102]
+
+# 16 bytes per frame
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "i8"),  # nanoseconds since the epoch
+    ("can_id", "u2"),
+    ("signal", "u1"),
+    ("value", "f4"),
+    ("warning", "?"),
+])
+
+
+def frames_to_dataframe(frames):
+    """Decode a structured array of frames into the CSV export layout."""
+    local_tz = datetime.now().astimezone().tzinfo
+    timestamps = pd.to_datetime(frames["timestamp"], unit="ns", utc=True).tz_convert(local_tz)
+    return pd.DataFrame({
+        "Timestamp": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "CAN ID": [f"0x{can_id:X}" for can_id in frames["can_id"].tolist()],
+        "Signal": np.array(SIGNAL_NAMES, dtype=object)[frames["signal"]],
+        "Value": frames["value"],
+        "Warning": frames["warning"],
+    })
+
+
+def dataframe_to_frames(data):
+    """Encode a DataFrame in the CSV export layout back into a structured array."""
+    frames = np.zeros(len(data), dtype=FRAME_DTYPE)
+    local_tz = datetime.now().astimezone().tzinfo
+    timestamps = pd.to_datetime(data["Timestamp"]).dt.tz_localize(local_tz).dt.as_unit("ns")
+    frames["timestamp"] = timestamps.astype("int64").to_numpy()
+    frames["can_id"] = [int(can_id, 16) for can_id in data["CAN ID"].astype(str)]
+    codes = {name: code for code, name in enumerate(SIGNAL_NAMES)}
+    frames["signal"] = data["Signal"].map(codes).fillna(0).astype("uint8").to_numpy()
+    frames["value"] = data["Value"].to_numpy()
+    frames["warning"] = data["Warning"].astype(bool).to_numpy()
+    return frames
+
+
+class CANRingBuffer:
+    """Preallocated ring buffer of CAN frames stored in a structured NumPy array.
+
+    Memory is fixed at `capacity` frames; once full, the oldest frames are
+    overwritten. `total` counts every frame ever written and doubles as a
+    sequence number, so readers can ask for "everything since N" and learn
+    how many frames they missed if they fell behind.
+    """
+
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.frames = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, timestamp, can_id, signal, value, warning=False):
+        with self.lock:
+            self.frames[self.total % self.capacity] = (timestamp, can_id, signal, value, warning)
+            self.total += 1
+
+    def extend(self, frames):
+        """Append a structured array of frames with at most two slice copies."""
+        with self.lock:
+            count = len(frames)
+            if count > self.capacity:
+                frames = frames[-self.capacity:]
+            start = (self.total + count - len(frames)) % self.capacity
+            first = min(len(frames), self.capacity - start)
+            self.frames[start:start + first] = frames[:first]
+            self.frames[:len(frames) - first] = frames[first:]
+            self.total += count
+
+    def segments(self, since=0):
+        """Return zero-copy views of the frames with sequence number >= `since`, oldest first.
+
+        The views alias the buffer and are only valid until the writer wraps
+        around; use `snapshot()` for a stable copy.
+        """
+        with self.lock:
+            return self.segments_locked(since)
+
+    def segments_locked(self, since):
+        start = max(since, self.total - self.capacity)
+        if start >= self.total:
+            return []
+        begin, end = start % self.capacity, self.total % self.capacity
+        if begin < end:
+            return [self.frames[begin:end]]
+        return [self.frames[begin:], self.frames[:end]] if end else [self.frames[begin:]]
+
+    def snapshot(self, since=0):
+        """Return a copy of the frames with sequence number >= `since`, oldest first."""
+        # Copy under the lock so the writer cannot overwrite the slots mid-copy
+        with self.lock:
+            segments = self.segments_locked(since)
+            if not segments:
+                return np.empty(0, dtype=FRAME_DTYPE)
+            return np.concatenate(segments)
+
+    def read(self, since):
+        """Copy the frames after sequence number `since` for a consumer that tracks a cursor.
+
+        Returns (frames, next cursor, number of frames overwritten before
+        they could be read).
+        """
+        with self.lock:
+            start = max(since, self.total - self.capacity)
+            positions = np.arange(start, self.total) % self.capacity
+            return self.frames[positions], self.total, start - since
+
+    def to_dataframe(self):
+        return frames_to_dataframe(self.snapshot())
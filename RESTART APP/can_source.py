@@ -0,0 +1,242 @@
+import os
+import queue
+import threading
+import time
+import numpy as np
+from can_buffer import FRAME_DTYPE, SIGNAL_IDS
+from can_writer import iter_segments, read_segment
+
+SOURCES = ["simulator", "replay", "python-can"]
+
+
+class CANSource:
+    """Background thread producing batches of frames (FRAME_DTYPE arrays).
+
+    Batches are handed over through a bounded queue read with `get()`. If
+    the consumer falls `max_pending` batches behind, new batches are
+    dropped and counted instead of growing memory, so `stats()` shows
+    whether the logging pipeline keeps up with the source.
+    """
+
+    name = "base"
+
+    def __init__(self, max_pending=256):
+        self.batches = queue.Queue(max_pending)
+        self.received = 0  # frames produced by the source
+        self.dropped = 0  # frames lost because the consumer fell behind
+        self.stopping = threading.Event()
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.started = None
+        self.last_stats = (0, 0.0)
+
+    def start(self):
+        self.started = time.monotonic()
+        self.last_stats = (0, self.started)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join(timeout=2)
+
+    def run(self):
+        try:
+            self.produce()
+        finally:
+            self.finished.set()
+
+    def produce(self):
+        """Call `emit()` with each batch until `stopping` is set."""
+        raise NotImplementedError
+
+    def emit(self, frames, block=False):
+        """Queue a batch; with `block`, wait for room instead of dropping it."""
+        self.received += len(frames)
+        while block and not self.stopping.is_set():
+            try:
+                self.batches.put(frames, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        try:
+            self.batches.put_nowait(frames)
+        except queue.Full:
+            self.dropped += len(frames)
+
+    def get(self, timeout=0.1):
+        """Return the next batch, or None if nothing arrived within `timeout`."""
+        try:
+            return self.batches.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stats(self):
+        """Counters plus the ingest rate (frames/s) since the previous call."""
+        now = time.monotonic()
+        received, then = self.last_stats
+        self.last_stats = (self.received, now)
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "rate": (self.received - received) / max(now - then, 1e-9),
+            "average": self.received / max(now - (self.started or now), 1e-9),
+        }
+
+
+class SimulatorSource(CANSource):
+    """Random values for every signal at `rate` frames per second.
+
+    The default rate matches the original simulator (one frame every 0.5 s);
+    raise it to load-test the logger, frames are generated in batches.
+    """
+
+    name = "simulator"
+
+    def __init__(self, rate=2.0, max_pending=256):
+        super().__init__(max_pending)
+        self.rate = rate
+        self.random = np.random.default_rng()
+
+    def produce(self):
+        signals = len(SIGNAL_IDS)
+        interval = max(signals / self.rate, 0.01)
+        count = max(signals, round(self.rate * interval))
+        signal = np.arange(count) % signals
+        can_ids = np.array(SIGNAL_IDS)[signal]
+        is_speed = signal != 1  # Engine Speed and Vehicle Speed range to 5000, Temperature to 120
+        spacing = np.arange(count - 1, -1, -1) * int(interval * 1e9 / count)  # spread over the last interval
+
+        while not self.stopping.is_set():
+            frames = np.zeros(count, dtype=FRAME_DTYPE)
+            frames["timestamp"] = time.time_ns() - spacing
+            frames["can_id"] = can_ids
+            frames["signal"] = signal
+            frames["value"] = np.where(is_speed, self.random.integers(0, 5001, count),
+                                       self.random.integers(0, 121, count))
+            self.emit(frames)
+            self.stopping.wait(interval)
+
+
+def load_recording(path):
+    """Read frames from a CSV export (can_data.csv), one segment file or a directory of segments."""
+    if os.path.isdir(path):
+        parts = list(iter_segments(path))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=FRAME_DTYPE)
+    # CSV segments share the export layout, so read_segment handles both
+    return np.array(read_segment(path))
+
+
+class ReplaySource(CANSource):
+    """Replay a recording at its original pace times `speed`, or as fast as possible.
+
+    With `speed=None` batches of `chunk_size` frames are pushed back to back
+    and the source waits for the consumer instead of dropping, which
+    measures the pipeline's maximum throughput. `loop` restarts the
+    recording, shifting timestamps so they keep increasing.
+    """
+
+    name = "replay"
+
+    def __init__(self, path="can_data.csv", speed=1.0, loop=False, chunk_size=4096, max_pending=256):
+        super().__init__(max_pending)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.chunk_size = chunk_size
+
+    def produce(self):
+        frames = load_recording(self.path)
+        if not len(frames):
+            return
+        offsets = frames["timestamp"] - frames["timestamp"][0]
+        # Recordings have second resolution at best, so leave a frame's worth of gap between passes
+        span = int(offsets[-1]) + max(int(np.diff(frames["timestamp"]).max(initial=0)), 1)
+
+        shift = 0
+        while not self.stopping.is_set():
+            if self.speed:
+                self.replay_paced(frames, offsets, shift)
+            else:
+                for start in range(0, len(frames), self.chunk_size):
+                    if self.stopping.is_set():
+                        return
+                    self.emit(self.shifted(frames[start:start + self.chunk_size], shift), block=True)
+            if not self.loop:
+                return
+            shift += span
+
+    def replay_paced(self, frames, offsets, shift):
+        started = time.monotonic()
+        sent = 0
+        while sent < len(frames) and not self.stopping.is_set():
+            elapsed_ns = (time.monotonic() - started) * self.speed * 1e9
+            due = int(np.searchsorted(offsets, elapsed_ns, side="right"))
+            if due > sent:
+                self.emit(self.shifted(frames[sent:due], shift))
+                sent = due
+            if sent < len(frames):
+                wait = (offsets[sent] - elapsed_ns) / self.speed / 1e9
+                self.stopping.wait(min(max(wait, 0.001), 0.01))
+
+    def shifted(self, frames, shift):
+        frames = frames.copy()
+        frames["timestamp"] += shift
+        return frames
+
+
+class PythonCANSource(CANSource):
+    """Read frames from a python-can bus, e.g. socketcan on vcan0 or the in-process virtual bus.
+
+    Only the arbitration IDs in SIGNAL_IDS are logged; other frames are
+    counted in `ignored`. A signal's value is the first two payload bytes
+    as a big-endian unsigned integer. Messages are grouped into batches of
+    up to `batch_size` frames or `batch_interval` seconds.
+    """
+
+    name = "python-can"
+
+    def __init__(self, channel="vcan0", interface="socketcan", batch_size=1024, batch_interval=0.01,
+                 max_pending=256):
+        super().__init__(max_pending)
+        self.channel = channel
+        self.interface = interface
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.ignored = 0
+
+    def produce(self):
+        import can
+
+        codes = {can_id: code for code, can_id in enumerate(SIGNAL_IDS)}
+        with can.Bus(channel=self.channel, interface=self.interface) as bus:
+            while not self.stopping.is_set():
+                rows = []
+                deadline = time.monotonic() + self.batch_interval
+                while len(rows) < self.batch_size:
+                    message = bus.recv(timeout=max(deadline - time.monotonic(), 0))
+                    if message is None:
+                        break
+                    code = codes.get(message.arbitration_id)
+                    if code is None or message.is_error_frame:
+                        self.ignored += 1
+                        continue
+                    value = int.from_bytes(bytes(message.data[:2]), "big")
+                    rows.append((int(message.timestamp * 1e9), message.arbitration_id, code, value, False))
+                if rows:
+                    self.emit(np.array(rows, dtype=FRAME_DTYPE))
+
+    def stats(self):
+        stats = super().stats()
+        stats["ignored"] = self.ignored
+        return stats
+
+
+def create_source(name, **options):
+    """Build a source by name with its keyword options."""
+    if name == "simulator":
+        return SimulatorSource(**options)
+    if name == "replay":
+        return ReplaySource(**options)
+    if name == "python-can":
+        return PythonCANSource(**options)
+    raise ValueError(f"Unknown CAN source: {name}")
@@ -0,0 +1,124 @@
+import glob
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from can_buffer import FRAME_DTYPE, dataframe_to_frames, frames_to_dataframe
+
+# Segment file formats: readable CSV, or raw FRAME_DTYPE records (16 bytes per frame)
+FORMATS = {"csv": ".csv", "bin": ".bin"}
+
+
+class SegmentWriter:
+    """Background thread streaming frames from a CANRingBuffer to rotating segment files.
+
+    Every `flush_interval` seconds the frames written since the last pass
+    are appended to the current segment. A new segment is started once the
+    current one reaches `max_bytes` or is `max_seconds` old. Data is fsynced
+    at most every `fsync_interval` seconds, which bounds what a crash can
+    lose without paying for a sync on every batch.
+    """
+
+    def __init__(self, buffer, directory="can_logs", fmt="csv", max_bytes=16 * 1024 * 1024,
+                 max_seconds=3600, flush_interval=0.5, fsync_interval=5.0, since=0):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown segment format: {fmt}")
+        self.buffer = buffer
+        self.directory = directory
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.cursor = since
+        self.dropped = 0  # frames overwritten in the buffer before they were written
+        self.written = 0
+
+        self.file = None
+        self.opened_at = 0
+        self.synced_at = 0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread.start()
+
+    def stop(self):
+        """Write the remaining frames, sync and close the current segment."""
+        self.stopping.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.stopping.wait(self.flush_interval):
+                self.write_pending()
+            self.write_pending()
+        finally:
+            self.close_segment()
+
+    def write_pending(self):
+        frames, self.cursor, dropped = self.buffer.read(self.cursor)
+        self.dropped += dropped
+        if not len(frames):
+            return
+
+        now = time.monotonic()
+        if self.file is None or self.file.tell() >= self.max_bytes or now - self.opened_at >= self.max_seconds:
+            self.open_segment(frames["timestamp"][0])
+
+        if self.fmt == "csv":
+            frames_to_dataframe(frames).to_csv(self.file, header=self.file.tell() == 0, index=False, lineterminator="\n")
+        else:
+            self.file.write(frames.tobytes())
+        self.written += len(frames)
+
+        if now - self.synced_at >= self.fsync_interval:
+            self.sync()
+
+    def open_segment(self, first_timestamp_ns):
+        self.close_segment()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(first_timestamp_ns / 1e9))
+        path = os.path.join(self.directory, f"can_{stamp}_{self.cursor:012d}{FORMATS[self.fmt]}")
+        self.file = open(path, "w", newline="") if self.fmt == "csv" else open(path, "wb")
+        self.opened_at = time.monotonic()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.synced_at = time.monotonic()
+
+    def close_segment(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+
+def segment_files(directory="can_logs"):
+    """Return the segment files in a directory, oldest first."""
+    paths = [path for ext in FORMATS.values() for path in glob.glob(os.path.join(directory, f"can_*{ext}"))]
+    return sorted(paths, key=os.path.basename)
+
+
+def read_segment(path):
+    """Load one segment as a structured array; binary segments are memory-mapped."""
+    if path.endswith(FORMATS["bin"]):
+        count = os.path.getsize(path) // FRAME_DTYPE.itemsize  # ignore a partly written last frame
+        if count == 0:
+            return np.empty(0, dtype=FRAME_DTYPE)
+        return np.memmap(path, dtype=FRAME_DTYPE, mode="r", shape=(count,))
+    return dataframe_to_frames(pd.read_csv(path))
+
+
+def iter_segments(directory="can_logs"):
+    """Yield each segment's frames in order, reading one file at a time."""
+    for path in segment_files(directory):
+        yield read_segment(path)
+
+
+def read_segments(directory="can_logs"):
+    """Concatenate all segments into a DataFrame in the CSV export layout."""
+    parts = [frames_to_dataframe(frames) for frames in iter_segments(directory)]
+    return pd.concat(parts, ignore_index=True) if parts else frames_to_dataframe(np.empty(0, dtype=FRAME_DTYPE))
@@ -0,0 +1,400 @@
+from collections import Counter
+from datetime import date
+import hashlib
+import json
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from absence_schema import COLUMNS, DATE_FORMAT, concat_typed, empty_frame, set_value, to_typed
+
+# Columns hashed into the persistent record key
+KEY_COLUMNS = ["Name", "Email Name", "Dates of Absences"]
+
+# Default columns of the duplicate-detection fingerprint. Send and response
+# fields are left out so a row imported again (sent after a failed attempt,
+# or after it was answered) still matches the stored record and updates it.
+DEDUP_COLUMNS = ["Dates of Absences", "Name", "Email Name", "Manager", "Email Manager"]
+
+# Record counts kept up to date on every write, by summary name
+AGGREGATES = {
+    "category": ["Category", "Justificative"],
+    "week": ["Dates of Absences"],
+    "manager": ["Manager"],
+}
+
+
+def _quote(column):
+    """Quote a column name for use in SQL statements."""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _to_sql_value(value):
+    """Convert a pandas/numpy scalar to a value sqlite3 can bind."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(DATE_FORMAT)
+    if hasattr(value, "item"):
+        return value.item()  # numpy scalar -> python scalar
+    return value
+
+
+def _aggregate_value(value):
+    """Format a column value as an aggregate key, matching SQLite's CAST(... AS TEXT)."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def iso_week(value):
+    """Return the ISO week partition ('2024-W49') of a stored date, or None if it is not a date."""
+    if value is None:
+        return None
+    try:
+        year, week, _ = date.fromisoformat(str(value)[:10]).isocalendar()
+    except ValueError:
+        return None
+    return f"{year}-W{week:02d}"
+
+
+# Summaries counted by a value derived from their one column: (key name, function).
+# Weeks are counted per ISO partition so the same week number in two years stays apart.
+DERIVED_KEYS = {"week": ("Week", iso_week)}
+
+
+def fingerprint(values):
+    """Hash column values into a signed 64-bit integer, which SQLite stores natively."""
+    text = "\x1f".join("" if v is None else str(v) for v in values)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def record_key(values, attempt=0):
+    """Hash the key column values (plus a collision counter) into a record key."""
+    text = "\x1f".join("" if v is None else str(v) for v in values)
+    if attempt:
+        text += f"\x1f{attempt}"
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class AbsenceStore:
+    """SQLite-backed storage for absence records.
+
+    New records are appended and edited records are updated in place, so
+    writing a batch costs the size of the batch rather than the size of the
+    whole history. Every record gets a persistent key, a hash of name, email
+    and absence date, which is used as the DataFrame index. Records sharing
+    those values get the next free key from `record_key(values, attempt)`.
+
+    Counts per Category/Justificative, ISO week and manager are kept in the
+    `aggregates` table and adjusted in the same transaction as each write,
+    so summaries never need a scan of the records. Writes also mark the ISO
+    weeks they touch in `dirty_weeks`, for the weekly KPI engine
+    (kpi_engine.py) to recompute just those weeks.
+
+    Each record also stores a 64-bit fingerprint of its `dedup_columns`
+    (DEDUP_COLUMNS unless configured), indexed so that `new_rows()` only
+    hashes an incoming batch and probes the index. The column choice is
+    saved in the database; passing other columns rehashes every record once.
+
+    `frame()` returns the records as one typed DataFrame (see
+    absence_schema.py) shared by every page and kept in step with writes;
+    dates are stored and hashed as DATE_FORMAT strings.
+    """
+
+    def __init__(self, db_file="saved_data.db", legacy_csv="saved_data.csv", dedup_columns=None):
+        self.db_file = db_file
+        self.listeners = []
+        self.data = None  # shared typed frame, loaded on first use
+        self.conn = sqlite3.connect(db_file)
+        self.conn.create_function("iso_week", 1, iso_week, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns_sql = ", ".join(
+            f"{_quote(col)} {'INTEGER' if col == 'Week' else 'TEXT'}" for col in COLUMNS
+        )
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS absences (id INTEGER PRIMARY KEY, row_key TEXT, {columns_sql})"
+        )
+        self.add_missing_keys()
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS absences_row_key ON absences (row_key)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS aggregates "
+            "(kind TEXT, k1 TEXT, k2 TEXT, count INTEGER, PRIMARY KEY (kind, k1, k2))"
+        )
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS absences_date ON absences ({_quote('Dates of Absences')})")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS dirty_weeks (week TEXT PRIMARY KEY)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)")
+        self.dedup_columns = self.fill_fingerprints(dedup_columns)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS absences_fingerprint ON absences (fingerprint)")
+
+        # Databases written by earlier versions get the derived tables built once
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 3:
+            self.rebuild_aggregates()
+        if version < 2:
+            dates = self.conn.execute(f"SELECT DISTINCT {_quote('Dates of Absences')} FROM absences")
+            self.mark_weeks(row[0] for row in dates)
+        self.conn.execute("PRAGMA user_version = 3")
+        self.conn.commit()
+
+        # One-time migration from the CSV file used by earlier versions
+        if self.count() == 0 and legacy_csv and os.path.exists(legacy_csv):
+            self.append(pd.read_csv(legacy_csv))
+
+    def count(self):
+        """Return the number of stored records."""
+        return self.conn.execute("SELECT COUNT(*) FROM absences").fetchone()[0]
+
+    def add_missing_keys(self):
+        """Add and fill the row_key column for databases created without it."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(absences)")]
+        if "row_key" not in columns:
+            self.conn.execute("ALTER TABLE absences ADD COLUMN row_key TEXT")
+
+        key_list = ", ".join(_quote(col) for col in KEY_COLUMNS)
+        missing = self.conn.execute(f"SELECT id, {key_list} FROM absences WHERE row_key IS NULL ORDER BY id").fetchall()
+        if missing:
+            taken = {row[0] for row in self.conn.execute("SELECT row_key FROM absences WHERE row_key IS NOT NULL")}
+            updates = [(self.next_key(values, taken), record_id) for record_id, *values in missing]
+            self.conn.executemany("UPDATE absences SET row_key = ? WHERE id = ?", updates)
+
+    def fill_fingerprints(self, dedup_columns=None):
+        """Add the fingerprint column and (re)hash every record if the dedup columns changed.
+
+        Returns the dedup columns in use: `dedup_columns`, else the ones saved
+        in the database, else DEDUP_COLUMNS.
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(absences)")]
+        if "fingerprint" not in columns:
+            self.conn.execute("ALTER TABLE absences ADD COLUMN fingerprint INTEGER")
+
+        saved = self.conn.execute("SELECT value FROM settings WHERE name = 'dedup_columns'").fetchone()
+        saved = json.loads(saved[0]) if saved else None
+        dedup_columns = list(dedup_columns or saved or DEDUP_COLUMNS)
+        unknown = set(dedup_columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown dedup columns: {', '.join(sorted(unknown))}")
+
+        if dedup_columns != saved or "fingerprint" not in columns:
+            column_list = ", ".join(_quote(col) for col in dedup_columns)
+            rows = self.conn.execute(f"SELECT id, {column_list} FROM absences").fetchall()
+            self.conn.executemany(
+                "UPDATE absences SET fingerprint = ? WHERE id = ?",
+                [(fingerprint(values), record_id) for record_id, *values in rows],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO settings (name, value) VALUES ('dedup_columns', ?)", (json.dumps(dedup_columns),)
+            )
+        return dedup_columns
+
+    def match_rows(self, rows):
+        """Return the fingerprint of each row of `rows` and the key of the stored record sharing it, or None.
+
+        Only the batch is hashed; its fingerprints are looked up in the
+        fingerprint index, so the cost follows the batch size, not the history.
+        """
+        rows = rows.reindex(columns=self.dedup_columns)
+        fingerprints = [
+            fingerprint([_to_sql_value(v) for v in values]) for values in rows.itertuples(index=False, name=None)
+        ]
+        stored = {}
+        unique = list(set(fingerprints))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            # The newest record wins when several share a fingerprint
+            stored.update(self.conn.execute(
+                f"SELECT fingerprint, row_key FROM absences WHERE fingerprint IN ({placeholders}) ORDER BY id", chunk
+            ).fetchall())
+        return fingerprints, [stored.get(value) for value in fingerprints]
+
+    def new_rows(self, rows, matches=None):
+        """Return a boolean mask of the rows that are neither stored nor repeated earlier in `rows`.
+
+        `matches` is the result of `match_rows(rows)` when the caller already has it.
+        """
+        fingerprints, keys = matches or self.match_rows(rows)
+        seen = set()
+        mask = np.zeros(len(fingerprints), dtype=bool)
+        for position, (value, key) in enumerate(zip(fingerprints, keys)):
+            if key is None and value not in seen:
+                mask[position] = True
+            seen.add(value)
+        return mask
+
+    def records(self, keys):
+        """Return the stored records with the given keys as a typed frame indexed by key."""
+        column_list = ", ".join(_quote(col) for col in COLUMNS)
+        chunks = []
+        for start in range(0, len(keys), 500):
+            chunk = list(keys[start:start + 500])
+            placeholders = ", ".join("?" for _ in chunk)
+            chunks.append(pd.read_sql_query(
+                f"SELECT row_key, {column_list} FROM absences WHERE row_key IN ({placeholders})", self.conn, params=chunk
+            ))
+        if not chunks:
+            return empty_frame()
+        return to_typed(pd.concat(chunks).set_index("row_key").rename_axis(None))
+
+    def key_exists(self, key):
+        return self.conn.execute("SELECT 1 FROM absences WHERE row_key = ?", (key,)).fetchone() is not None
+
+    def next_key(self, values, taken):
+        """Return the first free key for `values`, checking `taken` and the database."""
+        attempt = 0
+        key = record_key(values)
+        while key in taken or self.key_exists(key):
+            attempt += 1
+            key = record_key(values, attempt)
+        taken.add(key)
+        return key
+
+    def load(self):
+        """Load all records as a typed frame, newest first, indexed by record key."""
+        column_list = ", ".join(_quote(col) for col in COLUMNS)
+        data = pd.read_sql_query(f"SELECT row_key, {column_list} FROM absences ORDER BY id DESC", self.conn)
+        return to_typed(data.set_index("row_key").rename_axis(None))
+
+    def frame(self):
+        """Return the shared typed frame of all records, loading it on first use."""
+        if self.data is None:
+            self.data = self.load() if self.count() else empty_frame()
+        return self.data
+
+    def append(self, rows):
+        """Append new records and return their keys in the order of `rows`."""
+        rows = rows.reindex(columns=COLUMNS)
+        column_list = ", ".join(_quote(col) for col in COLUMNS)
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        sql = f"INSERT INTO absences (row_key, fingerprint, {column_list}) VALUES (?, ?, {placeholders})"
+
+        records = [[_to_sql_value(v) for v in values] for values in rows.itertuples(index=False, name=None)]
+        key_positions = [COLUMNS.index(col) for col in KEY_COLUMNS]
+        dedup_positions = [COLUMNS.index(col) for col in self.dedup_columns]
+        taken = set()
+        keys = [self.next_key([record[i] for i in key_positions], taken) for record in records]
+        fingerprints = [fingerprint([record[i] for i in dedup_positions]) for record in records]
+
+        # Insert in reverse so the first row of the batch gets the highest id
+        # and therefore sorts first when loading newest-first.
+        with self.conn:
+            self.conn.executemany(
+                sql, reversed([[key, value] + record for key, value, record in zip(keys, fingerprints, records)])
+            )
+            self.apply_aggregate_deltas(self.aggregate_deltas(records, 1))
+            self.mark_weeks(record[COLUMNS.index("Dates of Absences")] for record in records)
+
+        if self.data is not None:
+            rows = to_typed(rows)
+            rows.index = keys
+            self.data = concat_typed([rows, self.data])
+        self.notify()
+        return keys
+
+    def update_rows(self, changes):
+        """Apply edits given as {record key: {column: value}} in one transaction."""
+        aggregate_columns = {col for columns in AGGREGATES.values() for col in columns}
+        column_list = ", ".join(_quote(col) for col in COLUMNS)
+        with self.conn:
+            for key, values in changes.items():
+                values = {col: _to_sql_value(v) for col, v in values.items()}
+                old = self.conn.execute(f"SELECT {column_list} FROM absences WHERE row_key = ?", (key,)).fetchone()
+                if old is not None:
+                    new = [values.get(col, value) for col, value in zip(COLUMNS, old)]
+                    if aggregate_columns.intersection(values):
+                        # Move the record's counts from its old values to its new ones
+                        deltas = self.aggregate_deltas([old], -1)
+                        deltas.update(self.aggregate_deltas([new], 1))
+                        self.apply_aggregate_deltas(deltas)
+                    date_position = COLUMNS.index("Dates of Absences")
+                    self.mark_weeks([old[date_position], new[date_position]])
+                    if set(self.dedup_columns).intersection(values):
+                        values["fingerprint"] = fingerprint([new[COLUMNS.index(col)] for col in self.dedup_columns])
+
+                assignments = ", ".join(f"{_quote(col)} = ?" for col in values)
+                params = list(values.values()) + [key]
+                self.conn.execute(f"UPDATE absences SET {assignments} WHERE row_key = ?", params)
+
+        # Keep the shared frame in step; edits already applied there are simply rewritten
+        if self.data is not None:
+            positions = self.data.index.get_indexer(list(changes))
+            for position, values in zip(positions, changes.values()):
+                if position >= 0:
+                    for column, value in values.items():
+                        set_value(self.data, position, column, value)
+        self.notify()
+
+    def subscribe(self, callback):
+        """Call `callback()` after every append or update."""
+        self.listeners.append(callback)
+
+    def notify(self):
+        for callback in self.listeners:
+            callback()
+
+    def aggregate_deltas(self, records, sign):
+        """Count `records` (value lists in COLUMNS order) per aggregate key, times `sign`."""
+        deltas = Counter()
+        for kind, columns in AGGREGATES.items():
+            positions = [COLUMNS.index(col) for col in columns]
+            for record in records:
+                values = [record[i] for i in positions]
+                if kind in DERIVED_KEYS:
+                    values = [DERIVED_KEYS[kind][1](values[0])]
+                if any(value is None for value in values):
+                    continue
+                keys = [_aggregate_value(value) for value in values] + [""] * (2 - len(values))
+                deltas[(kind, *keys)] += sign
+        return deltas
+
+    def apply_aggregate_deltas(self, deltas):
+        self.conn.executemany(
+            "INSERT INTO aggregates (kind, k1, k2, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (kind, k1, k2) DO UPDATE SET count = count + excluded.count",
+            [(*key, delta) for key, delta in deltas.items() if delta],
+        )
+
+    def mark_weeks(self, dates):
+        """Record the ISO weeks of `dates` as needing their KPIs recomputed."""
+        weeks = {iso_week(value) for value in dates} - {None}
+        self.conn.executemany("INSERT OR IGNORE INTO dirty_weeks (week) VALUES (?)", [(week,) for week in weeks])
+
+    def rebuild_aggregates(self):
+        """Recompute every aggregate from the records with one GROUP BY per summary."""
+        self.conn.execute("DELETE FROM aggregates")
+        for kind, columns in AGGREGATES.items():
+            if kind in DERIVED_KEYS:
+                # Registered with the connection in __init__
+                expressions = [f"{DERIVED_KEYS[kind][1].__name__}({_quote(columns[0])})"]
+            else:
+                expressions = [f"CAST({_quote(col)} AS TEXT)" for col in columns]
+            keys = expressions + ["''"] * (2 - len(expressions))
+            not_null = " AND ".join(f"{expression} IS NOT NULL" for expression in expressions)
+            self.conn.execute(
+                f"INSERT INTO aggregates (kind, k1, k2, count) "
+                f"SELECT ?, {keys[0]}, {keys[1]}, COUNT(*) FROM absences WHERE {not_null} GROUP BY 2, 3",
+                (kind,),
+            )
+
+    def aggregate(self, kind):
+        """Return the stored counts for one summary as a DataFrame with a Count column.
+
+        The week summary is keyed by ISO partition ('2024-W49'), which sorts in date order.
+        """
+        columns = [DERIVED_KEYS[kind][0]] if kind in DERIVED_KEYS else AGGREGATES[kind]
+        rows = self.conn.execute(
+            "SELECT k1, k2, count FROM aggregates WHERE kind = ? AND count > 0 ORDER BY k1, k2", (kind,)
+        ).fetchall()
+        return pd.DataFrame([row[:len(columns)] + row[2:] for row in rows], columns=columns + ["Count"])
+
+    def compact(self):
+        """Fold the write-ahead log back into the database file and reclaim space."""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("VACUUM")
+
+    def close(self):
+        """Checkpoint and close the database connection."""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
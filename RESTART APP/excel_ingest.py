@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+import os
+import pandas as pd
+from absence_schema import REQUIRED_COLUMNS
+
+# Columns kept from uploaded sheets: the required ones plus Manager
+PROJECTED_COLUMNS = ["Dates of Absences", "Name", "Email Name", "Manager", "Email Manager"]
+
+
+def cell_text(value):
+    """Dates as YYYY-MM-DD, other cells unchanged."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def read_sheet(rows):
+    """Project PROJECTED_COLUMNS out of an iterator of row tuples whose first row is the header.
+
+    Raises ValueError as soon as the header shows a required column is
+    missing, before any data row is read.
+    """
+    header = next(rows, None) or ()
+    positions = {name: i for i, name in enumerate(header) if name in PROJECTED_COLUMNS}
+    missing = REQUIRED_COLUMNS - set(positions)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    columns = {name: [] for name in positions}
+    for row in rows:
+        if not any(cell is not None for cell in row):
+            continue  # Blank rows are common at the end of exported sheets
+        for name, i in positions.items():
+            columns[name].append(cell_text(row[i]) if i < len(row) else None)
+    return pd.DataFrame(columns)
+
+
+def read_workbook(file_path):
+    """Read every sheet of one workbook; returns [(sheet name, DataFrame or error message)].
+
+    .xlsx files are streamed with openpyxl in read-only mode so only the
+    projected cells are kept in memory; legacy .xls files go through pandas.
+    """
+    results = []
+    if file_path.lower().endswith(".xls"):
+        sheets = pd.read_excel(file_path, sheet_name=None, dtype=object)
+        for name, sheet in sheets.items():
+            rows = iter([tuple(sheet.columns)] + list(sheet.itertuples(index=False, name=None)))
+            try:
+                results.append((name, read_sheet(rows)))
+            except ValueError as e:
+                results.append((name, str(e)))
+        return results
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            try:
+                results.append((sheet.title, read_sheet(sheet.iter_rows(values_only=True))))
+            except ValueError as e:
+                results.append((sheet.title, str(e)))
+    finally:
+        workbook.close()
+    return results
+
+
+def read_workbooks(file_paths, log=print, max_workers=None):
+    """Read and concatenate the valid sheets of several workbooks, parsing them in parallel.
+
+    Each workbook is parsed in its own worker process (a single file is read
+    in-process). Sheets without the required columns and unreadable files
+    are reported through `log` and skipped. Returns None if no sheet could be used.
+    """
+    file_paths = list(file_paths)
+    if len(file_paths) == 1:
+        outcomes = [read_outcome(file_paths[0])]
+    else:
+        workers = min(len(file_paths), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(read_outcome, file_paths))
+
+    frames = []
+    for file_path, sheets in zip(file_paths, outcomes):
+        file_name = os.path.basename(file_path)
+        if isinstance(sheets, str):
+            log(f">> Could not read {file_name}: {sheets}")
+            continue
+        for sheet_name, result in sheets:
+            if isinstance(result, str):
+                log(f">> Skipped {file_name} [{sheet_name}]: {result}")
+            else:
+                log(f">> Read {len(result)} rows from {file_name} [{sheet_name}].")
+                frames.append(result)
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True).reindex(columns=PROJECTED_COLUMNS)
+
+
+def read_outcome(file_path):
+    """Run read_workbook, returning the error message instead of raising (for worker processes)."""
+    try:
+        return read_workbook(file_path)
+    except Exception as e:
+        return str(e)
@@ -1,40 +1,38 @@
+import re
 import customtkinter as ctk
-import pandas as pd
 from tkinter import ttk, filedialog
-from PIL import Image
-import os
+from absence_core import merge_records, response_changes
+from absence_schema import CATEGORY_MAPPING, UNKNOWN_CATEGORY, set_value
+from assets import get_image
+from record_index import RecordIndex
+from virtual_table import VirtualTable
 
 class AnalysisFrame(ctk.CTkFrame):
-    def __init__(self, parent):
+    def __init__(self, parent, store):
         super().__init__(parent, fg_color="white", corner_radius=10)
         self.grid_rowconfigure(0, weight=1)  # Expandable space
         self.grid_columnconfigure(0, weight=1)
 
-        # Initialize data and file path
+        # Typed records shared through the store, which also persists them locally
         self.data = None
-        self.data_file = "saved_data.csv"  # File to persist data locally
+        self.store = store
+        self.row_index = {}  # record key -> position in self.data
+        self.pending_updates = {}  # record key -> {column: value} not yet saved
+        self.index = None  # filter indexes over self.data, built when Tk is idle after each load
+        self.index_job = None
+        self.filter_job = None
 
         # Justificative to Category Mapping
-        self.category_mapping = {
-            "Absence pour raisons de santé": "Absence",
-            "Mise à jour manquante": "Mise à jour planning",
-            "Autorisation du responsable direct": "Mise à jour planning",
-            "Congé planifié": "Mise à jour planning",
-            "Décalage de planning": "A verifier",
-            "Absence excepionnelle non prévu": "Absence",
-            "Intervention chez un client/autre emplacement": "Mise à jour planning",
-            "Probléme de badge d'accès": "A verifier",
-            "Attente d'information": "Attente d'information",
-            "Démission": "Mise à jour planning"
-        }
+        self.category_mapping = CATEGORY_MAPPING
 
-        # Construct the image path
-        image_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_images")        
-        # Load the image
-        self.large_test_image = ctk.CTkImage(Image.open(os.path.join(image_path, "header3.png")), size=(500, 150))
+        # Header image, shared through the asset cache
+        self.large_test_image = get_image("header3.png", size=(500, 150))
         self.home_frame_large_image_label = ctk.CTkLabel(self, text="", image=self.large_test_image)
         self.home_frame_large_image_label.pack(padx=20, pady=10)
 
+        # Filter bar; each keystroke re-filters the table once typing pauses
+        self.build_filter_bar()
+
         # Treeview for data table
         # Configure the style for Treeview headings
         style = ttk.Style()
@@ -43,13 +41,13 @@ class AnalysisFrame(ctk.CTkFrame):
             font=("Arial", 12, "bold"),  # Set the font to bold
             foreground="black"  # Set text color
         )
-        self.tree = ttk.Treeview(self, columns=(), show="headings", height=10)
+        # Only the visible rows are materialized as Treeview items
+        self.table = VirtualTable(self, height=10)
+        self.tree = self.table.tree
         self.tree.pack(padx=20, pady=10, fill="both", expand=True)
 
         # Configure scrollbar
-        tree_scroll = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scroll.set)
-        tree_scroll.pack(side="right", fill="y")
+        self.table.scrollbar.pack(side="right", fill="y")
 
         # CTkTextbox for logs
         self.log_textbox = ctk.CTkTextbox(
@@ -83,6 +81,88 @@ class AnalysisFrame(ctk.CTkFrame):
         # Load existing data if available
         self.load_data_from_file()
 
+    def build_filter_bar(self):
+        bar = ctk.CTkFrame(self, fg_color="white")
+        bar.pack(padx=20, pady=(0, 5), fill="x")
+
+        self.name_filter = ctk.CTkEntry(bar, placeholder_text="Name", width=150, fg_color="white", text_color="black")
+        self.manager_filter = ctk.CTkEntry(bar, placeholder_text="Manager", width=150, fg_color="white", text_color="black")
+        self.week_from_filter = ctk.CTkEntry(bar, placeholder_text="Week from", width=100, fg_color="white", text_color="black")
+        self.week_to_filter = ctk.CTkEntry(bar, placeholder_text="Week to", width=100, fg_color="white", text_color="black")
+        for entry in [self.name_filter, self.manager_filter, self.week_from_filter, self.week_to_filter]:
+            entry.pack(side="left", padx=5)
+            entry.bind("<KeyRelease>", self.schedule_filter)
+
+        categories = sorted(set(self.category_mapping.values()) | {UNKNOWN_CATEGORY})
+        self.category_filter = ttk.Combobox(bar, values=["All"] + categories, width=15, state="readonly")
+        self.category_filter.set("All")
+        self.category_filter.pack(side="left", padx=5)
+        self.category_filter.bind("<<ComboboxSelected>>", self.schedule_filter)
+
+        self.unanswered_filter = ctk.CTkCheckBox(bar, text="No response yet", text_color="black", command=self.schedule_filter)
+        self.unanswered_filter.pack(side="left", padx=5)
+
+        self.filter_label = ctk.CTkLabel(bar, text="", text_color="black")
+        self.filter_label.pack(side="right", padx=5)
+
+    def schedule_filter(self, event=None):
+        """Re-filter the table 150 ms after the last change to the filter bar."""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(150, self.apply_filters)
+
+    def filtered_positions(self):
+        """Return the positions of the rows matching the filter bar, or None to show every row."""
+        if self.data is None:
+            return None
+        category = self.category_filter.get()
+        filters = {
+            "name": self.name_filter.get().strip(),
+            "manager": self.manager_filter.get().strip(),
+            "category": None if category == "All" else category,
+            "week_from": self.week_bound(self.week_from_filter.get()),
+            "week_to": self.week_bound(self.week_to_filter.get()),
+            "unanswered": bool(self.unanswered_filter.get()),
+        }
+        positions = None
+        # The index is only built once a filter is actually set
+        if filters["name"] or filters["manager"] or filters["unanswered"] or any(
+            filters[key] is not None for key in ["category", "week_from", "week_to"]
+        ):
+            self.build_index()
+            positions = self.index.search(**filters)
+        shown = len(self.data) if positions is None else len(positions)
+        self.filter_label.configure(text=f"{shown} of {len(self.data)} rows")
+        return positions
+
+    @staticmethod
+    def week_bound(text):
+        """Return a week bound typed in the filter bar: (year, week) for '2024-W50', a week number
+        for '50', or None for anything else."""
+        match = re.fullmatch(r"\s*(\d{4})\s*-?\s*[Ww]?\s*(\d{1,2})\s*", text)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+        try:
+            return int(text)
+        except ValueError:
+            return None
+
+    def schedule_index(self):
+        """Build the filter indexes once Tk is idle, so the first keystroke does not pay for them."""
+        if self.index_job is not None:
+            self.after_cancel(self.index_job)
+        self.index_job = self.after_idle(self.build_index)
+
+    def build_index(self):
+        self.index_job = None
+        if self.index is None and self.data is not None:
+            self.index = RecordIndex(self.data)
+
+    def apply_filters(self):
+        self.filter_job = None
+        if self.data is not None:
+            self.table.set_view(self.filtered_positions())
+
     def log_message(self, message):
         """Log messages to the CTkTextbox."""
         self.log_textbox.configure(state="normal")
@@ -92,8 +172,8 @@ class AnalysisFrame(ctk.CTkFrame):
 
     def add_to_row(self):
         """Add Date of Response and Justificative to the selected row."""
-        selected_item = self.tree.focus()  # Get selected item in Treeview
-        if not selected_item:
+        selected_position = self.table.selected_position()  # Get selected row in the table
+        if selected_position is None:
             self.log_message(">> No row selected.")
             return
 
@@ -103,65 +183,63 @@ class AnalysisFrame(ctk.CTkFrame):
         if not date_response or not justificative:
             self.log_message(">> Both Date of Response and Justificative are required.")
             return
+        try:
+            changes = response_changes(date_response, justificative)
+        except ValueError as e:
+            self.log_message(f">> {e}")
+            return
 
-        row_values = self.tree.item(selected_item, "values")
-        row_idx = self.data.index[self.data["Dates of Absences"] == row_values[0]].tolist()
-
-        if row_idx:
-            row_idx = row_idx[0]
-            self.data.at[row_idx, "Date of Response"] = date_response
-            self.data.at[row_idx, "Justificative"] = justificative
-            self.data.at[row_idx, "Category"] = self.category_mapping.get(justificative, "Unknown")
-            self.tree.item(selected_item, values=self.data.iloc[row_idx].tolist())
-            self.log_message(f">> Updated row {row_idx} with Date: {date_response}, Justificative: {justificative}")
+        row_key = self.data.index[self.table.data_position(selected_position)]
+        self.update_row(row_key, changes)
+        self.log_message(f">> Updated row {row_key} with Date: {date_response}, Justificative: {justificative}")
+
+    def update_row(self, row_key, changes):
+        """Apply edits to one record, redraw it and queue it for saving."""
+        position = self.row_index[row_key]
+        for column, value in changes.items():
+            set_value(self.data, position, column, value)
+        self.pending_updates.setdefault(row_key, {}).update(changes)
+        if self.index is not None:
+            self.index.update(position, changes)
+        # The row stays in view until the filters change, even if it no longer matches
+        view_position = self.table.view_position(position)
+        if view_position is not None:
+            self.table.refresh_row(view_position)
 
     def save_responses(self):
         """Save the responses and justificative data back to the dataframe."""
         self.save_data_to_file()
-        self.log_message(f">> Data saved to {self.data_file}")
+        self.log_message(f">> Data saved to {self.store.db_file}")
 
     def save_data_to_file(self):
-        """Save the current data to a CSV file."""
-        if self.data is not None:
-            self.data.to_csv(self.data_file, index=False)
+        """Write pending row edits to the store."""
+        if self.pending_updates:
+            self.store.update_rows(self.pending_updates)
+            self.pending_updates = {}
 
     def load_data_from_file(self):
-        """Load data from the CSV file if it exists."""
-        if os.path.exists(self.data_file):
-            self.data = pd.read_csv(self.data_file)
-            self.update_data(self.data)
+        """Load data from the store if it holds any records."""
+        if self.store.count():
+            self.data = self.store.frame()
+            self.refresh_table()
             self.log_message(">> Loaded data from file.")
         else:
             self.log_message(">> No existing data file found.")
 
     def update_data(self, new_data):
-        existing_data = None
-        if os.path.exists(self.data_file):
-            existing_data = pd.read_csv(self.data_file)
-
-        if existing_data is not None:
-            self.data = pd.concat([new_data, existing_data], ignore_index=True)
-        else:
-            self.data = new_data
-
-        # Add Category column based on Justificative
-        if "Category" not in self.data.columns:
-            self.data.insert(self.data.columns.get_loc("Justificative"), "Category", "")
-
-        self.data["Category"] = self.data["Justificative"].map(self.category_mapping)
-
-        self.data.drop_duplicates(inplace=True, keep="first")
-        self.data.reset_index(drop=True, inplace=True)
+        # Categorize, skip rows already stored and persist the rest (see absence_core.py);
+        # the store prepends them to the shared frame
+        merge_records(self.store, new_data)
+        self.data = self.store.frame()
+        self.save_data_to_file()
 
-        # Update the Treeview
-        self.tree.delete(*self.tree.get_children())
-        self.tree["columns"] = list(self.data.columns)
-        for col in self.data.columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=120, anchor="center")
+        self.refresh_table()
+        self.log_message(">> Data updated and saved.")
 
-        for _, row in self.data.iterrows():
-            self.tree.insert("", "end", values=row.tolist())
+    def refresh_table(self):
+        """Point the table at the current data; only the visible rows are drawn."""
+        self.row_index = {row_key: position for position, row_key in enumerate(self.data.index)}
+        self.index = None
+        self.table.set_data(self.data, self.filtered_positions())
+        self.schedule_index()
 
-        self.save_data_to_file()
-        self.log_message(">> Data updated and saved.")
@@ -1,13 +1,14 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib import colormaps
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import customtkinter as ctk
 
 
 class DashboardFrame(ctk.CTkFrame):
-    def __init__(self, parent):
+    def __init__(self, parent, store):
         super().__init__(parent, corner_radius=0, fg_color="white")
+        self.store = store
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
@@ -36,6 +37,14 @@ class DashboardFrame(ctk.CTkFrame):
         # Load the plot data (same for all pages)
         self.plot_data = self.load_plot_data()
 
+        # One long-lived figure and canvas per page, created on first visit
+        self.page_builders = [self.draw_category_pie, self.draw_week_bars, self.draw_manager_bars]
+        self.pages = {}
+
+        # Redraw when the analysis page adds or edits records
+        self.refresh_pending = False
+        self.store.subscribe(self.schedule_refresh)
+
         # Display the initial plot
         self.display_plot()
 
@@ -49,20 +58,44 @@ class DashboardFrame(ctk.CTkFrame):
         footer.grid(row=10, column=0, columnspan=2, padx=20, pady=10, sticky="ew")
 
     def load_plot_data(self):
-        # Load data from 'saved_data.csv'
-        file_path = 'saved_data.csv'  # Replace with your actual file path
-        data = pd.read_csv(file_path)
+        # Count occurrences of each combination of Category and Justificative,
+        # read from the summary the store keeps up to date on every write
+        return self.store.aggregate("category")
 
-        # Count occurrences of each combination of Category and Justificative
-        category_justificative_counts = data.groupby(['Category', 'Justificative']).size().reset_index(name='Count')
+    def display_plot(self):
+        """Show the current page, building its figure and canvas on first visit."""
+        if self.current_plot_index not in self.pages:
+            fig = Figure(figsize=(10, 8))  # Adjusted figure size
+            canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
+            self.page_builders[self.current_plot_index](fig)
+            canvas.draw()
+            self.pages[self.current_plot_index] = canvas
+
+        # Swap the visible canvas; other pages keep their figures for instant switching
+        for index, canvas in self.pages.items():
+            if index != self.current_plot_index:
+                canvas.get_tk_widget().pack_forget()
+        self.pages[self.current_plot_index].get_tk_widget().pack(fill="both", expand=True)
 
-        return category_justificative_counts
+        # Update button states based on current plot
+        self.update_buttons()
 
-    def display_plot(self):
-        # Clear existing plot
-        for widget in self.plot_frame.winfo_children():
-            widget.destroy()
+    def schedule_refresh(self):
+        """Coalesce store notifications into one redraw when Tk is idle."""
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.after_idle(self.refresh_plots)
 
+    def refresh_plots(self):
+        """Reload the data and redraw every page that has been built, in place."""
+        self.refresh_pending = False
+        self.plot_data = self.load_plot_data()
+        for index, canvas in self.pages.items():
+            canvas.figure.clear()
+            self.page_builders[index](canvas.figure)
+            canvas.draw_idle()
+
+    def draw_category_pie(self, fig):
         # Use the same plot data for all pages
         data = self.plot_data
 
@@ -78,12 +111,12 @@ class DashboardFrame(ctk.CTkFrame):
         inner_sizes = category_totals.values
 
         # Colors
-        cmap = plt.get_cmap("tab20c")
+        cmap = colormaps["tab20c"]
         inner_colors = cmap(np.arange(len(categories)) * 4)
-        outer_colors = cmap(np.repeat(np.arange(len(categories)), len(justificatives) // len(categories)))
+        outer_colors = cmap(np.repeat(np.arange(len(categories)), len(justificatives) // max(len(categories), 1)))
 
         # Create the pie chart
-        fig, ax = plt.subplots(figsize=(10, 8))  # Adjusted figure size
+        ax = fig.add_subplot(111)
 
         # Adjust space around the plot
         fig.subplots_adjust(left=0.1, right=0.75)  # Added space to the right for the legend
@@ -122,14 +155,23 @@ class DashboardFrame(ctk.CTkFrame):
             title_fontsize=12,
         )
 
-        # Embed the plot into the tkinter frame
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-        canvas_widget = canvas.get_tk_widget()
-        canvas_widget.pack(fill="both", expand=True)
-        canvas.draw()
-
-        # Update button states based on current plot
-        self.update_buttons()
+    def draw_week_bars(self, fig):
+        # Absences per ISO week
+        data = self.store.aggregate("week")
+        ax = fig.add_subplot(111)
+        ax.bar(data["Week"].astype(str), data["Count"], color="dodgerblue")
+        ax.set_title("Absences per Week")
+        ax.set_xlabel("WEEK")
+        ax.set_ylabel("Count")
+
+    def draw_manager_bars(self, fig):
+        # Absences per manager, largest at the top
+        data = self.store.aggregate("manager").sort_values("Count")
+        ax = fig.add_subplot(111)
+        ax.barh(data["Manager"], data["Count"], color="orange")
+        ax.set_title("Absences per Manager")
+        ax.set_xlabel("Count")
+        fig.subplots_adjust(left=0.25)
 
     def update_buttons(self):
         if self.current_plot_index == 0:
@@ -155,4 +197,4 @@ class DashboardFrame(ctk.CTkFrame):
         # Move to the previous plot
         if self.current_plot_index > 0:
             self.current_plot_index -= 1
-            self.display_plot()
\ No newline at end of file
+            self.display_plot()
\ No newline at end of file
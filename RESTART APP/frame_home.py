@@ -1,24 +1,47 @@
 import customtkinter as ctk
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
+from kpi_data import load_weekly_kpis
 import numpy as np
-from PIL import Image
-import os
+from assets import get_image
+
+
+def week_labels(data):
+    """Label each KPI row by ISO year and week ('2025-W02') when the year is known, else as 'S2'."""
+    if "YEAR" in data.columns:
+        return [f"{year}-W{week:02d}" for year, week in zip(data["YEAR"], data["WEEK"])]
+    return [f"S{week}" for week in data["WEEK"]]
 
 
 class HomeFrame(ctk.CTkFrame):
-    def __init__(self, parent):
+    def __init__(self, parent, store=None):
         super().__init__(parent, corner_radius=0, fg_color="white")
 
-        # Label for title
-        image_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_images")        
-        self.large_test_image = ctk.CTkImage(Image.open(os.path.join(image_path, "header1.png")), size=(500, 150))
+        # KPIs come from the absence records when there are any, else from saved_data.xlsx
+        self.store = None
+        self.kpi_engine = None
+        self.refresh_pending = False
+        self.handlers = {"draw": lambda event: None, "hover": lambda event: None}  # set by draw_kpis
+
+        # Header image, shared through the asset cache
+        self.large_test_image = get_image("header1.png", size=(500, 150))
         self.home_frame_large_image_label = ctk.CTkLabel(self, text="", image=self.large_test_image)
         self.home_frame_large_image_label.pack(padx=20, pady=10, side="top")
 
-        # Add the plot to the frame
-        self.add_plot()
+        # Summary cards and chart are built once and redrawn in place when the KPIs change
+        self.add_summary_card()
+        self.error_label = ctk.CTkLabel(self, text="", text_color="red")
+
+        # Define the size of the plot (width, height in inches)
+        plot_width = 10
+        plot_height = 8  # Adjust this value for height
+        self.fig = Figure(figsize=(plot_width, plot_height), dpi=100)
+
+        # Embed plot in CustomTkinter frame
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(padx=20, pady=10, fill="both", expand=True)
+        self.canvas.mpl_connect("draw_event", lambda event: self.handlers["draw"](event))
+        self.canvas.mpl_connect("motion_notify_event", lambda event: self.handlers["hover"](event))
 
         # Footer
         footer = ctk.CTkLabel(
@@ -30,12 +53,17 @@ class HomeFrame(ctk.CTkFrame):
         )
         footer.pack(padx=20, pady=10, side="bottom", fill="x")
 
-    def add_summary_card(self, data):
-        # Calculate metrics
-        last_week = data["WEEK"].max()
-        total_absences = data["NB ABSENT"].sum()
-        total_absence_percentage = data["absence"].mean()
+        self.refresh_plot()
+        if store is not None:
+            self.set_store(store)
+
+    def set_store(self, store):
+        """Take the KPIs from `store` from now on, redrawing whenever it is written."""
+        self.store = store
+        store.subscribe(self.schedule_refresh)
+        self.schedule_refresh()
 
+    def add_summary_card(self):
         # Create a frame for the summary cards
         summary_frame = ctk.CTkFrame(self, fg_color="white", corner_radius=10)
         summary_frame.pack(padx=20, pady=(10, 5), fill="x")
@@ -43,140 +71,182 @@ class HomeFrame(ctk.CTkFrame):
         # Left Card - Last Week
         last_week_frame = ctk.CTkFrame(summary_frame, fg_color="lightgray", corner_radius=10)
         last_week_frame.pack(side="left", padx=10, pady=5, expand=True, fill="both")
-        last_week_label = ctk.CTkLabel(
+        self.last_week_label = ctk.CTkLabel(
             last_week_frame, 
-            text=f"Last Week: {last_week}", 
+            text="", 
             font=("Arial", 14, "bold"), 
             text_color="blue"
         )
-        last_week_label.pack(padx=10, pady=10)
+        self.last_week_label.pack(padx=10, pady=10)
 
         # Center Card - Total Absences
         total_absences_frame = ctk.CTkFrame(summary_frame, fg_color="lightgray", corner_radius=10)
         total_absences_frame.pack(side="left", padx=10, pady=5, expand=True, fill="both")
-        total_absences_label = ctk.CTkLabel(
+        self.total_absences_label = ctk.CTkLabel(
             total_absences_frame, 
-            text=f"Total Absences: {total_absences}", 
+            text="", 
             font=("Arial", 14, "bold"), 
             text_color="red"
         )
-        total_absences_label.pack(padx=10, pady=10)
+        self.total_absences_label.pack(padx=10, pady=10)
 
         # Right Card - Avg Absence Percentage
         absence_percentage_frame = ctk.CTkFrame(summary_frame, fg_color="lightgray", corner_radius=10)
         absence_percentage_frame.pack(side="left", padx=10, pady=5, expand=True, fill="both")
-        absence_percentage_label = ctk.CTkLabel(
+        self.absence_percentage_label = ctk.CTkLabel(
             absence_percentage_frame, 
-            text=f"Avg Absence (%): {total_absence_percentage:.2f}%", 
+            text="", 
             font=("Arial", 14, "bold"), 
             text_color="purple"
         )
-        absence_percentage_label.pack(padx=10, pady=10)
+        self.absence_percentage_label.pack(padx=10, pady=10)
 
-    def add_plot(self):
-        # Load and process data
-        file_path = "saved_data.xlsx"  # Update the path as needed
+    def update_summary_card(self, data):
+        # Calculate metrics; rows are in week order, so the last one is the latest week
+        last_week = week_labels(data)[-1] if len(data) else "-"
+        total_absences = data["NB ABSENT"].sum()
+        total_absence_percentage = data["absence"].mean()
 
+        self.last_week_label.configure(text=f"Last Week: {last_week}")
+        self.total_absences_label.configure(text=f"Total Absences: {total_absences}")
+        self.absence_percentage_label.configure(text=f"Avg Absence (%): {total_absence_percentage:.2f}%")
+
+    def load_kpis(self):
+        """Return the weekly KPIs, computed from the records or read from the workbook."""
+        if self.store is not None and self.store.count():
+            if self.kpi_engine is None:
+                from kpi_engine import WeeklyKPIEngine
+                self.kpi_engine = WeeklyKPIEngine(self.store)
+            # Only weeks touched since the last call are recomputed
+            return self.kpi_engine.weekly()
+
+        # Load the typed data, from the cache when the workbook is unchanged
+        return load_weekly_kpis("saved_data.xlsx")
+
+    def schedule_refresh(self):
+        """Coalesce store notifications into one redraw when Tk is idle."""
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.after_idle(self.refresh_plot)
+
+    def refresh_plot(self):
+        """Update the summary cards and redraw the chart in place from the current KPIs."""
+        self.refresh_pending = False
+        self.fig.clear()
         try:
-            # Load the data
-            data = pd.read_excel(file_path)
-
-            # Process WEEK: Remove "S" and convert to integers
-            data["WEEK"] = data["WEEK"].str.replace("S", "").astype(int)
-
-            # Process percentages: Remove "%" and convert to float
-            data["Unplanned presence"] = data["Unplanned presence"].str.replace("%", "").astype(float)
-            data["absence"] = data["absence"].str.replace("%", "").astype(float)
-
-            # Reverse the data order by WEEK
-            data = data.sort_values("WEEK", ascending=True)
-
-            # Add summary card above the plot
-            self.add_summary_card(data)
-
-            # Define the size of the plot (width, height in inches)
-            plot_width = 10
-            plot_height = 8  # Adjust this value for height
-
-            # Plotting
-            fig = Figure(figsize=(plot_width, plot_height), dpi=100)
-            ax1 = fig.add_subplot(111)
-
-            # Bar plots
-            bar_width = 0.25
-            x = np.arange(len(data["WEEK"]))
-            bars1 = ax1.bar(x - bar_width, data["Pplanifie"], width=bar_width, label="Pplanifie", color="blue")
-            bars2 = ax1.bar(x, data["Npplanifie"], width=bar_width, label="Npplanifie", color="orange")
-            bars3 = ax1.bar(x + bar_width, data["NB ABSENT"], width=bar_width, label="NB ABSENT", color="green")
-
-            ax1.set_xlabel("WEEK")
-            ax1.set_ylabel("Counts")
-            ax1.set_title("Dual-Axis Combo Chart with Dynamic Data Labels")
-            ax1.set_xticks(x)
-            ax1.set_xticklabels(data["WEEK"])
-            ax1.legend(loc="upper left")
-
-            # Secondary Y-axis
-            ax2 = ax1.twinx()
-            line1, = ax2.plot(x, data["Unplanned presence"], label="Unplanned presence (%)", color="red", marker="o")
-            line2, = ax2.plot(x, data["absence"], label="absence (%)", color="purple", marker="o")
-            ax2.set_ylabel("Percentage (%)")
-            ax2.legend(loc="upper right")
-
-            # Embed plot in CustomTkinter frame
-            canvas = FigureCanvasTkAgg(fig, master=self)
-            canvas_widget = canvas.get_tk_widget()
-            canvas_widget.pack(padx=20, pady=10, fill="both", expand=True)
-
-            # Dynamic data label handling
-            annot = ax1.annotate(
-                "",
-                xy=(0, 0),
-                xytext=(10, 10),
-                textcoords="offset points",
-                bbox=dict(boxstyle="round", fc="w"),
-                arrowprops=dict(arrowstyle="->"),
-            )
-            annot.set_visible(False)
-
-            def update_annot(obj, text, x, y):
-                """Update annotation position and text."""
-                annot.xy = (x, y)
+            data = self.load_kpis()
+            self.update_summary_card(data)
+            self.draw_kpis(self.fig, data)
+            self.error_label.pack_forget()
+        except Exception as e:
+            # Error handling
+            self.error_label.configure(text=f"Error: {e}")
+            self.error_label.pack(padx=20, pady=10, before=self.canvas.get_tk_widget())
+        self.canvas.draw_idle()
+
+    def draw_kpis(self, fig, data):
+        """Plot the weekly KPIs on `fig` and install the hover handlers for them."""
+        canvas = self.canvas
+
+        # Plotting
+        ax1 = fig.add_subplot(111)
+
+        # Bar plots
+        bar_width = 0.25
+        x = np.arange(len(data["WEEK"]))
+        bars1 = ax1.bar(x - bar_width, data["Pplanifie"], width=bar_width, label="Pplanifie", color="blue")
+        bars2 = ax1.bar(x, data["Npplanifie"], width=bar_width, label="Npplanifie", color="orange")
+        bars3 = ax1.bar(x + bar_width, data["NB ABSENT"], width=bar_width, label="NB ABSENT", color="green")
+
+        ax1.set_xlabel("WEEK")
+        ax1.set_ylabel("Counts")
+        ax1.set_title("Dual-Axis Combo Chart with Dynamic Data Labels")
+        ax1.set_xticks(x)
+        ax1.set_xticklabels(week_labels(data), rotation=45, ha="right")
+        ax1.legend(loc="upper left")
+
+        # Secondary Y-axis
+        ax2 = ax1.twinx()
+        line1, = ax2.plot(x, data["Unplanned presence"], label="Unplanned presence (%)", color="red", marker="o")
+        line2, = ax2.plot(x, data["absence"], label="absence (%)", color="purple", marker="o")
+        ax2.set_ylabel("Percentage (%)")
+        ax2.legend(loc="upper right")
+
+        # Dynamic data label handling; the annotation is animated so it can
+        # be blitted on top of a cached background instead of redrawing the figure
+        annot = ax1.annotate(
+            "",
+            xy=(0, 0),
+            xytext=(10, 10),
+            textcoords="offset points",
+            bbox=dict(boxstyle="round", fc="w"),
+            arrowprops=dict(arrowstyle="->"),
+            animated=True,
+        )
+        annot.set_visible(False)
+
+        # Hit-testing index: bars sorted by left edge in ax1 data coordinates
+        all_bars = [bar for bars in [bars1, bars2, bars3] for bar in bars]
+        all_bars.sort(key=lambda bar: bar.get_x())
+        bar_lefts = np.array([bar.get_x() for bar in all_bars])
+        bar_rights = bar_lefts + np.array([bar.get_width() for bar in all_bars])
+        bar_heights = np.array([bar.get_height() for bar in all_bars])
+
+        lines = [(line1, "Unplanned presence"), (line2, "absence")]
+        hover_state = {"background": None, "hovered": None, "points": []}
+
+        def on_draw(event):
+            """Cache the rendered background and line points in pixels after every full draw."""
+            hover_state["background"] = canvas.copy_from_bbox(fig.bbox)
+            hover_state["points"] = [
+                ax2.transData.transform(np.column_stack([line.get_xdata(), line.get_ydata()]))
+                for line, _ in lines
+            ]
+            if annot.get_visible():
+                ax1.draw_artist(annot)
+                canvas.blit(fig.bbox)
+
+        def find_hovered(event):
+            """Return (text, xy, coordinate transform) for the element under the cursor."""
+            # Line points take priority since they are drawn above the bars
+            for (line, label), points in zip(lines, hover_state["points"]):
+                i = np.searchsorted(points[:, 0], event.x)
+                for idx in (i - 1, i):
+                    if 0 <= idx < len(points) and np.hypot(*(points[idx] - (event.x, event.y))) <= line.get_pickradius():
+                        y_val = line.get_ydata()[idx]
+                        return f"{label}: {y_val:.2f}%", (x[idx], y_val), ax2.transData
+
+            x_val, y_val = ax1.transData.inverted().transform((event.x, event.y))
+            idx = np.searchsorted(bar_lefts, x_val, side="right") - 1
+            if idx >= 0 and x_val <= bar_rights[idx] and min(0, bar_heights[idx]) <= y_val <= max(0, bar_heights[idx]):
+                bar = all_bars[idx]
+                return f"{bar.get_height()}", (bar.get_x() + bar.get_width() / 2, bar.get_height()), ax1.transData
+            return None
+
+        def hover(event):
+            """Handle hover event, redrawing the annotation only when the hovered element changes."""
+            if hover_state["background"] is None:
+                return
+            hovered = find_hovered(event) if event.inaxes in (ax1, ax2) else None
+            if hovered == hover_state["hovered"]:
+                return
+            hover_state["hovered"] = hovered
+
+            if hovered:
+                text, xy, transform = hovered
+                annot.xycoords = transform
+                annot.xy = xy
                 annot.set_text(text)
                 annot.get_bbox_patch().set_alpha(0.8)
+            annot.set_visible(hovered is not None)
 
-            def hover(event):
-                """Handle hover event."""
-                visible = False
-                # Check bars
-                for bars in [bars1, bars2, bars3]:
-                    for bar in bars:
-                        if bar.contains(event)[0]:
-                            value = bar.get_height()
-                            update_annot(bar, f"{value}", bar.get_x() + bar.get_width() / 2, bar.get_height())
-                            annot.set_visible(True)
-                            visible = True
-                # Check line points
-                for line, label in zip([line1, line2], ["Unplanned presence", "absence"]):
-                    if line.contains(event)[0]:
-                        idx = line.contains(event)[1]["ind"][0]
-                        x_val = x[idx]
-                        y_val = line.get_ydata()[idx]
-                        update_annot(line, f"{label}: {y_val:.2f}%", x_val, y_val)
-                        annot.set_visible(True)
-                        visible = True
+            canvas.restore_region(hover_state["background"])
+            if hovered:
+                ax1.draw_artist(annot)
+            canvas.blit(fig.bbox)
 
-                if not visible:
-                    annot.set_visible(False)
-                canvas.draw_idle()
-
-            # Connect the hover event to the canvas
-            canvas.mpl_connect("motion_notify_event", hover)
-
-        except Exception as e:
-            # Error handling
-            error_label = ctk.CTkLabel(self, text=f"Error: {e}", text_color="red")
-            error_label.pack(padx=20, pady=10)
+        # Route the canvas events connected in __init__ to this chart
+        self.handlers = {"draw": on_draw, "hover": hover}
 
 
 
@@ -1,18 +1,8 @@
-from datetime import datetime
-import sys
-import pandas as pd
-import win32com.client as win32
+import queue
 import customtkinter as ctk
-from PIL import Image, ImageTk
-from tkinter import filedialog, ttk
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from pptx import Presentation
-from pptx.util import Inches
-import io
-from PIL import Image
-import os
+from tkinter import filedialog
+from assets import get_image
+from mail_transport import TRANSPORTS, create_transport
 
 class SendEmailFrame(ctk.CTkFrame):
     def __init__(self, parent, analysis_callback):
@@ -23,22 +13,21 @@ class SendEmailFrame(ctk.CTkFrame):
         # Store the analysis callback to call when done
         self.analysis_callback = analysis_callback
         
-        self.file_path = None
-        self.date_of_send = None
+        self.file_paths = []
+        self.send_job = None
+        self.poll_interval_ms = 100
 
-        # Construct the image path
-        image_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_images")        
-        # Load the image
-        self.large_test_image = ctk.CTkImage(Image.open(os.path.join(image_path, "header2.png")), size=(500, 150))
+        # Header image, shared through the asset cache
+        self.large_test_image = get_image("header2.png", size=(500, 150))
         self.home_frame_large_image_label = ctk.CTkLabel(self, text="", image=self.large_test_image)
         self.home_frame_large_image_label.pack(padx=20, pady=10)
 
 
         # Step 1: File upload
-        step1_label = ctk.CTkLabel(self, text="Step 1: Upload an Excel file", font=("Arial", 18, "bold"), text_color=("dodgerblue", "blue2"))
+        step1_label = ctk.CTkLabel(self, text="Step 1: Upload Excel files", font=("Arial", 18, "bold"), text_color=("dodgerblue", "blue2"))
         step1_label.pack(padx=20, pady=10)
 
-        upload_button = ctk.CTkButton(self, text="Upload File", width=150, command=self.upload_file)
+        upload_button = ctk.CTkButton(self, text="Upload Files", width=150, command=self.upload_file)
         upload_button.pack(padx=10, pady=5)
 
         self.upload_log = ctk.CTkLabel(self, text="", font=("Arial", 12))
@@ -55,8 +44,32 @@ class SendEmailFrame(ctk.CTkFrame):
         self.body_input.insert("1.0", "Bonjour {name},\n\nVotre absence a été notée pour les dates suivantes : {dates}.\n\n\n\n\n\n\nMerci de fournir une justification.\n\n\n\nCordialement,\n")
         self.body_input.pack(padx=20, pady=10)
 
-        send_button = ctk.CTkButton(self, text="Send Emails", width=150, command=self.send_emails)
-        send_button.pack(padx=20, pady=10)
+        send_controls = ctk.CTkFrame(self, fg_color="white")
+        send_controls.pack(padx=20, pady=10)
+
+        transport_label = ctk.CTkLabel(send_controls, text="Send via:", font=("Arial", 12))
+        transport_label.pack(side="left", padx=5)
+        self.transport_menu = ctk.CTkOptionMenu(send_controls, values=TRANSPORTS, width=90)
+        self.transport_menu.set("Outlook")
+        self.transport_menu.pack(side="left", padx=5)
+
+        concurrency_label = ctk.CTkLabel(send_controls, text="Parallel sends:", font=("Arial", 12))
+        concurrency_label.pack(side="left", padx=5)
+        self.concurrency_menu = ctk.CTkOptionMenu(send_controls, values=["1", "2", "4", "8"], width=70)
+        self.concurrency_menu.set("4")
+        self.concurrency_menu.pack(side="left", padx=5)
+
+        self.digest_checkbox = ctk.CTkCheckBox(send_controls, text="One email per employee", font=("Arial", 12))
+        self.digest_checkbox.pack(side="left", padx=10)
+
+        self.send_button = ctk.CTkButton(send_controls, text="Send Emails", width=150, command=self.send_emails)
+        self.send_button.pack(side="left", padx=10)
+
+        self.cancel_button = ctk.CTkButton(send_controls, text="Cancel", width=100, state="disabled", command=self.cancel_send)
+        self.cancel_button.pack(side="left", padx=5)
+
+        self.progress_label = ctk.CTkLabel(self, text="", font=("Arial", 12))
+        self.progress_label.pack(padx=10)
 
         self.email_log = ctk.CTkTextbox(self, width=600, height=200, text_color="black", fg_color="white", font=("Arial", 12), border_width=2)
         self.email_log.pack(padx=20, pady=10)
@@ -66,62 +79,74 @@ class SendEmailFrame(ctk.CTkFrame):
         footer.pack(padx=20, pady=10, side="bottom")
 
     def upload_file(self):
-        """Handle file upload for the Send Emails section."""
-        file_name = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx;*.xls")])
-        if file_name:
-            self.file_path = file_name
-            self.upload_log.configure(text=f">> File uploaded: {file_name}", text_color="green", font=("Arial", 12, "bold"))
+        """Handle file upload for the Send Emails section; every sheet of every file is sent."""
+        file_names = filedialog.askopenfilenames(filetypes=[("Excel Files", "*.xlsx;*.xls")])
+        if file_names:
+            self.file_paths = list(file_names)
+            uploaded = file_names[0] if len(file_names) == 1 else f"{len(file_names)} files"
+            self.upload_log.configure(text=f">> File uploaded: {uploaded}", text_color="green", font=("Arial", 12, "bold"))
         else:
             self.upload_log.configure(text=">> No file selected.", text_color="red")
 
     def send_emails(self):
-        """Send emails based on the uploaded Excel file."""
-        if not self.file_path:
+        """Start sending emails for the uploaded Excel file in the background."""
+        if not self.file_paths:
             self.email_log.insert("1.0", ">> No file uploaded!\n")
             return
+        if self.send_job is not None:
+            self.email_log.insert("1.0", ">> A batch is already being sent.\n")
+            return
 
-        try:
-            # Read Excel file
-            data = pd.read_excel(self.file_path)
-            outlook = win32.Dispatch("Outlook.Application")
+        # Imported here so pandas is only loaded once a batch is actually sent
+        from send_pipeline import SendJob
+
+        # Read the widgets here; the job itself never touches Tk
+        concurrency = int(self.concurrency_menu.get())
+        self.send_job = SendJob(
+            self.file_paths,
+            self.subject_input.get(),
+            self.body_input.get("1.0", "end-1c"),
+            create_transport(self.transport_menu.get(), pool_size=concurrency),
+            concurrency=concurrency,
+            digest=self.digest_checkbox.get() == 1,
+        )
+        self.send_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.progress_label.configure(text=">> Starting...")
+        self.send_job.start()
+        self.after(self.poll_interval_ms, self.poll_send_job)
+
+    def cancel_send(self):
+        """Ask the running batch to stop after the emails in flight."""
+        if self.send_job is not None:
+            self.send_job.cancel()
+            self.cancel_button.configure(state="disabled")
+            self.progress_label.configure(text=">> Cancelling...")
+
+    def poll_send_job(self):
+        """Drain events from the send job and show them in the log."""
+        job = self.send_job
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event[0] == "log":
+                self.email_log.insert("1.0", event[1] + "\n")
+            elif event[0] == "progress":
+                self.progress_label.configure(text=f">> {event[1]} / {event[2]} emails processed")
+            elif event[0] == "done":
+                self.finish_send_job(event[1])
+                return
 
-            # Capture the date when emails are sent
-            self.date_of_send = datetime.now().strftime("%Y-%m-%d")
+        self.after(self.poll_interval_ms, self.poll_send_job)
 
-            # Validate required columns
-            required_columns = {"Name", "Email Name", "Dates of Absences", "Email Manager"}
-            if not required_columns.issubset(data.columns):
-                missing = required_columns - set(data.columns)
-                self.email_log.insert("1.0", f">> Missing columns: {', '.join(missing)}\n")
-                return
+    def finish_send_job(self, data):
+        self.send_job = None
+        self.send_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
 
-            # Calculate the Week based on "Dates of Absences"
-            if "Dates of Absences" in data.columns:
-                data["Week"] = pd.to_datetime(
-                    data["Dates of Absences"], errors="coerce"
-                ).apply(lambda x: x.isocalendar()[1] if pd.notnull(x) else None)
-            else:
-                self.email_log.insert("1.0", ">> Column 'Dates of Absences' not found in data. Skipping week calculation.\n")
-
-            # Send emails and update the data
-            for _, row in data.iterrows():
-                try:
-                    mail = outlook.CreateItem(0)
-                    mail.Subject = self.subject_input.get()
-                    mail.Body = self.body_input.get("1.0", "end-1c").format(name=row["Name"], dates=row["Dates of Absences"])
-                    mail.To = row["Email Name"]
-                    mail.CC = row["Email Manager"]
-                    mail.Send()
-
-                    # Update the data with the sent date
-                    data.loc[data['Email Name'] == row['Email Name'], 'Date of Send'] = self.date_of_send
-                    self.email_log.insert("1.0", f">> Email sent to {row['Email Name']}.\n")
-                except Exception as e:
-                    self.email_log.insert("1.0", f">> Failed to send email to {row['Email Name']}: {str(e)}\n")
-
-            # After sending emails, pass the updated data to the analysis callback
-            if self.analysis_callback:
-                self.analysis_callback(data)
-
-        except Exception as e:
-            self.email_log.insert("1.0", f">> Error reading Excel file: {str(e)}\n")
+        # After sending emails, pass the updated data to the analysis callback
+        if data is not None and self.analysis_callback:
+            self.analysis_callback(data)
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import pickle
+import pandas as pd
+
+CACHE_DIR = ".cache"
+
+
+def normalize_kpis(data):
+    """Turn the raw weekly KPI sheet into typed columns sorted by week."""
+    # Process WEEK: Remove "S" and convert to integers
+    data["WEEK"] = data["WEEK"].astype(str).str.replace("S", "").astype(int)
+
+    # Process percentages: Remove "%" and convert to float
+    for column in ["Unplanned presence", "absence"]:
+        data[column] = data[column].astype(str).str.replace("%", "").astype(float)
+
+    # Order the data by WEEK, within YEAR for tables exported from the records
+    order = ["YEAR", "WEEK"] if "YEAR" in data.columns else ["WEEK"]
+    return data.sort_values(order, ascending=True).reset_index(drop=True)
+
+
+def file_digest(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_weekly_kpis(file_path="saved_data.xlsx", cache_dir=CACHE_DIR):
+    """Load the weekly KPI table, reusing a pickled copy while the workbook is unchanged.
+
+    The cache is keyed by the workbook's mtime and size; if those changed
+    but the content hash did not (e.g. the file was copied), the cached
+    frame is still used and the key refreshed.
+    """
+    stat = os.stat(file_path)
+    cache_file = os.path.join(cache_dir, os.path.splitext(os.path.basename(file_path))[0] + "_kpis.pkl")
+
+    cached = None
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                cached = pickle.load(f)
+        except Exception:
+            cached = None  # Unreadable cache: rebuild it below
+
+    if cached and (cached["mtime_ns"], cached["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return cached["data"]
+
+    digest = file_digest(file_path)
+    if cached and cached["sha1"] == digest:
+        data = cached["data"]
+    else:
+        data = normalize_kpis(pd.read_excel(file_path))
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump(
+                {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest, "data": data},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+    except OSError:
+        pass  # Caching is an optimization; a read-only directory still works
+    return data
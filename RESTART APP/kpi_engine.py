@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+import json
+import pandas as pd
+from absence_schema import parse_dates
+
+# Columns of the weekly KPI table, in the layout of saved_data.xlsx / output.json
+KPI_COLUMNS = ["WEEK", "Unplanned presence", "absence", "Pplanifie", "Npplanifie", "NB ABSENT"]
+
+# Categories meaning the absence was planned and only the schedule was out of date
+PLANNED_CATEGORIES = ["Mise à jour planning"]
+
+
+def compute_week_kpis(records):
+    """Compute the KPIs of every ISO week present in `records` (Dates of Absences and Category).
+
+    There is no headcount in the absence data, so every figure is relative
+    to the week's absence records:
+
+        NB ABSENT           records dated in the week
+        Pplanifie           records whose Category is planned (PLANNED_CATEGORIES)
+        Npplanifie          records with any other Category
+        Unplanned presence  Npplanifie / (Pplanifie + Npplanifie), in %
+        absence             records in the "Absence" category / NB ABSENT, in %
+
+    Records without a response yet count in NB ABSENT only.
+    """
+    dates = parse_dates(records["Dates of Absences"])
+    iso = dates.dt.isocalendar()
+    category = records["Category"].astype(object)
+    frame = pd.DataFrame({
+        "year": iso["year"],
+        "week": iso["week"],
+        "planned": category.isin(PLANNED_CATEGORIES),
+        "unplanned": category.notna() & ~category.isin(PLANNED_CATEGORIES),
+        "absent": category.eq("Absence"),
+    })[dates.notna().to_numpy()]
+
+    kpis = frame.groupby(["year", "week"]).agg(
+        Pplanifie=("planned", "sum"),
+        Npplanifie=("unplanned", "sum"),
+        absences=("absent", "sum"),
+        records=("planned", "size"),
+    ).reset_index()
+    answered = kpis["Pplanifie"] + kpis["Npplanifie"]
+    kpis["Unplanned presence"] = (100 * kpis["Npplanifie"] / answered.where(answered > 0)).fillna(0).round(2)
+    kpis["absence"] = (100 * kpis["absences"] / kpis["records"]).round(2)
+    kpis["partition"] = kpis["year"].astype(str) + "-W" + kpis["week"].astype(str).str.zfill(2)
+    return kpis.rename(columns={"records": "NB ABSENT"})
+
+
+def week_range(partition):
+    """Return the first day of an ISO week partition ('2024-W49') and of the following week, as ISO strings."""
+    year, week = partition.split("-W")
+    monday = date.fromisocalendar(int(year), int(week), 1)
+    return monday.isoformat(), (monday + timedelta(days=7)).isoformat()
+
+
+class WeeklyKPIEngine:
+    """Weekly KPIs computed from the absence records, cached per ISO week.
+
+    Finished weeks are kept in the store's `weekly_kpis` table. The store
+    marks the weeks touched by every append or edit in `dirty_weeks`, and
+    `refresh()` recomputes only those weeks, reading just their records
+    through the date index, so the cost of an update follows the size of
+    the change rather than of the history.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.conn = store.conn
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS weekly_kpis (partition TEXT PRIMARY KEY, year INTEGER, week INTEGER, "
+            "Pplanifie INTEGER, Npplanifie INTEGER, nb_absent INTEGER, unplanned_presence REAL, absence REAL)"
+        )
+        self.conn.commit()
+
+    def refresh(self, chunk_size=200):
+        """Recompute the KPIs of every week marked dirty; returns the number of weeks recomputed."""
+        dirty = [row[0] for row in self.conn.execute("SELECT week FROM dirty_weeks")]
+        for start in range(0, len(dirty), chunk_size):
+            weeks = dirty[start:start + chunk_size]
+            ranges = [week_range(week) for week in weeks]
+            where = " OR ".join('("Dates of Absences" >= ? AND "Dates of Absences" < ?)' for _ in ranges)
+            records = pd.read_sql_query(
+                f'SELECT "Dates of Absences", Category FROM absences WHERE {where}',
+                self.conn,
+                params=[day for bounds in ranges for day in bounds],
+            )
+            kpis = compute_week_kpis(records)
+            kpis = kpis[kpis["partition"].isin(weeks)]
+
+            placeholders = ", ".join("?" for _ in weeks)
+            with self.conn:
+                self.conn.execute(f"DELETE FROM weekly_kpis WHERE partition IN ({placeholders})", weeks)
+                self.conn.executemany(
+                    "INSERT INTO weekly_kpis VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    kpis[["partition", "year", "week", "Pplanifie", "Npplanifie", "NB ABSENT",
+                          "Unplanned presence", "absence"]].astype(object).to_numpy().tolist(),
+                )
+                self.conn.execute(f"DELETE FROM dirty_weeks WHERE week IN ({placeholders})", weeks)
+        return len(dirty)
+
+    def weekly(self):
+        """Return the up-to-date KPIs oldest week first, typed like kpi_data.load_weekly_kpis.
+
+        A YEAR column comes first, since the history can span several ISO years.
+        """
+        self.refresh()
+        data = pd.read_sql_query(
+            'SELECT year AS YEAR, week AS WEEK, unplanned_presence AS "Unplanned presence", absence, Pplanifie, '
+            'Npplanifie, nb_absent AS "NB ABSENT" FROM weekly_kpis ORDER BY partition',
+            self.conn,
+        )
+        return data[["YEAR"] + KPI_COLUMNS]
+
+    def export(self, file_path="output.json"):
+        """Write the KPIs newest week first in the output.json / saved_data.xlsx layout ('S45', '35.85%'), plus YEAR."""
+        data = self.weekly().iloc[::-1].reset_index(drop=True)
+        data["WEEK"] = "S" + data["WEEK"].astype(str)
+        for column in ["Unplanned presence", "absence"]:
+            data[column] = data[column].map("{:.2f}%".format)
+        if file_path.lower().endswith(".json"):
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(data.to_dict(orient="records"), f, indent=4, ensure_ascii=False)
+        else:
+            data.to_excel(file_path, index=False)
+        return data
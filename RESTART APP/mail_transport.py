@@ -0,0 +1,243 @@
+from email.message import EmailMessage
+import os
+import queue
+import smtplib
+import threading
+import time
+
+
+class SendCancelled(Exception):
+    """Raised by `send` when the transport was cancelled before the message went out."""
+
+
+class MailTransport:
+    """Interface for sending one email; implementations must be thread-safe."""
+
+    name = "base"
+
+    def send(self, to, cc, subject, body):
+        raise NotImplementedError
+
+    def cancel(self):
+        """Wake up any sender waiting inside the transport; it raises SendCancelled."""
+
+    def close(self):
+        """Release any connections held by the transport."""
+
+
+class OutlookTransport(MailTransport):
+    """Send through the local Outlook client over COM (Windows only)."""
+
+    name = "Outlook"
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def outlook(self):
+        """Return this thread's Outlook instance, starting COM on first use."""
+        if not hasattr(self.local, "outlook"):
+            import pythoncom
+            import win32com.client as win32
+
+            pythoncom.CoInitialize()
+            self.local.outlook = win32.Dispatch("Outlook.Application")
+        return self.local.outlook
+
+    def send(self, to, cc, subject, body):
+        mail = self.outlook().CreateItem(0)
+        mail.Subject = subject
+        mail.Body = body
+        mail.To = to
+        mail.CC = cc
+        mail.Send()
+
+
+class FakeTransport(MailTransport):
+    """Count messages without sending them, for benchmarks and headless runs.
+
+    `latency` seconds are spent per message to stand in for a server round trip.
+    """
+
+    name = "Fake"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def send(self, to, cc, subject, body):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.sent += 1
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second, shared between threads.
+
+    The bucket holds at least one token so rates below 1/s (e.g. 0.5 for
+    30 mails a minute) still let a call through.
+    """
+
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive.")
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def stop(self):
+        """Release every waiting caller; `wait` returns False from now on."""
+        self.stopped.set()
+
+    def wait(self):
+        """Block until a call is allowed; returns False if the limiter was stopped."""
+        while not self.stopped.is_set():
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                delay = (1 - self.tokens) / self.rate
+            self.stopped.wait(delay)
+        return False
+
+
+class SMTPTransport(MailTransport):
+    """Send over SMTP using a pool of persistent connections.
+
+    Connections are opened on demand up to `pool_size` and reused for every
+    following message, so a batch pays the connect/EHLO/login cost once per
+    connection instead of once per email. Each worker thread sends on its own
+    connection; `rate_limit` caps the total messages per second.
+    """
+
+    name = "SMTP"
+
+    def __init__(self, host="localhost", port=25, sender=None, username=None, password=None,
+                 starttls=False, pool_size=4, rate_limit=None, timeout=30):
+        self.host = host
+        self.port = port
+        self.sender = sender or (username if username else f"noreply@{host}")
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    def connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+    def acquire(self):
+        """Take an idle connection, open a new one if the pool is not full, or wait."""
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                can_open = self.opened < self.pool_size
+                if can_open:
+                    self.opened += 1
+            if can_open:
+                break
+            try:
+                # Wake up periodically in case a broken connection freed a slot
+                return self.idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        try:
+            return self.connect()
+        except Exception:
+            with self.lock:
+                self.opened -= 1
+            raise
+
+    def discard(self, connection):
+        with self.lock:
+            self.opened -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def send(self, to, cc, subject, body):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to
+        if cc:
+            message["Cc"] = cc
+        message["Subject"] = subject
+        message.set_content(body)
+
+        if self.limiter and not self.limiter.wait():
+            raise SendCancelled()
+
+        connection = self.acquire()
+        try:
+            try:
+                connection.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection; reconnect once
+                connection.close()
+                connection = self.connect()
+                connection.send_message(message)
+        except Exception:
+            self.discard(connection)
+            raise
+        self.idle.put(connection)
+
+    def cancel(self):
+        if self.limiter:
+            self.limiter.stop()
+
+    def close(self):
+        while True:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.quit()
+            except Exception:
+                connection.close()
+            with self.lock:
+                self.opened -= 1
+
+
+TRANSPORTS = ["Outlook", "SMTP"]
+
+
+def create_transport(name, pool_size=4):
+    """Build a transport by name; SMTP settings come from SMTP_* environment variables."""
+    if name == "Outlook":
+        return OutlookTransport()
+    if name == "SMTP":
+        rate_limit = os.environ.get("SMTP_RATE_LIMIT")
+        return SMTPTransport(
+            host=os.environ.get("SMTP_HOST", "localhost"),
+            port=int(os.environ.get("SMTP_PORT", "8025")),
+            sender=os.environ.get("SMTP_SENDER"),
+            username=os.environ.get("SMTP_USER"),
+            password=os.environ.get("SMTP_PASSWORD"),
+            starttls=os.environ.get("SMTP_STARTTLS", "0") == "1",
+            pool_size=pool_size,
+            rate_limit=float(rate_limit) if rate_limit else None,
+        )
+    if name == "Fake":
+        return FakeTransport(float(os.environ.get("FAKE_MAIL_LATENCY", "0")))
+    raise ValueError(f"Unknown mail transport: {name}")
@@ -1,14 +1,23 @@
+import time
+STARTED = time.perf_counter()
+
+import importlib
 import os
+import sys
 import customtkinter as ctk
 from navigation import NavigationFrame
-from frame_home import HomeFrame
-from frame_send_email import SendEmailFrame
-from frame_analysis import AnalysisFrame
-from frame_dashboard import DashboardFrame
+from startup_timing import StartupTimer
+
+
+def load_class(module_name, class_name):
+    """Import a frame module on first use and return the requested class."""
+    return getattr(importlib.import_module(module_name), class_name)
+
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, timer=None):
         super().__init__()
+        self.timer = timer or StartupTimer(STARTED, enabled=False)
 
         # App Window Configuration
         self.title("Workspace Management Application")
@@ -18,20 +27,52 @@ class App(ctk.CTk):
         image_path = os.path.join(os.path.dirname(__file__), "test_images", "app_logo.ico")
         self.iconbitmap(image_path)
 
+        # Absence records shared by the analysis and dashboard pages, opened on first use
+        self.store = None
+
         # Navigation Frame
-        self.navigation_frame = NavigationFrame(self, self.select_frame_by_name)
-        self.navigation_frame.grid(row=0, column=0, sticky="nsw", padx=0, pady=0)
-
-        # Frames
-        self.frames = {
-            "home": HomeFrame(self),  # Implement HomeFrame based on your requirements
-            "send_email": SendEmailFrame(self, self.update_analysis_frame),
-            "analysis": AnalysisFrame(self),
-            "dashboard": DashboardFrame(self)  # Implement DashboardFrame based on your requirements
+        with self.timer.measure("navigation"):
+            self.navigation_frame = NavigationFrame(self, self.select_frame_by_name)
+            self.navigation_frame.grid(row=0, column=0, sticky="nsw", padx=0, pady=0)
+
+        # Frames are built (and their modules imported) the first time they are shown
+        self.frame_builders = {
+            "home": lambda: load_class("frame_home", "HomeFrame")(self),
+            "send_email": lambda: load_class("frame_send_email", "SendEmailFrame")(self, self.update_analysis_frame),
+            "analysis": lambda: load_class("frame_analysis", "AnalysisFrame")(self, self.get_store()),
+            "dashboard": lambda: load_class("frame_dashboard", "DashboardFrame")(self, self.get_store()),
         }
+        self.frames = {}
 
         # Set the default frame
         self.select_frame_by_name("home")
+        self.after_idle(self.on_first_paint)
+
+    def on_first_paint(self):
+        self.timer.record("first paint", time.perf_counter() - STARTED)
+        self.timer.report()
+        self.after_idle(self.attach_home_store)
+
+    def attach_home_store(self):
+        """Open the store once the window is up and let Home switch to KPIs from the records."""
+        self.get_frame("home").set_store(self.get_store())
+
+    def get_store(self):
+        if self.store is None:
+            with self.timer.measure("absence store"):
+                from data_store import AbsenceStore
+                self.store = AbsenceStore()
+        return self.store
+
+    def get_frame(self, name):
+        """Return the frame for `name`, building and laying it out on first use."""
+        if name not in self.frames:
+            with self.timer.measure(f"{name} page"):
+                frame = self.frame_builders[name]()
+                frame.grid(row=0, column=1, sticky="nsew")
+                frame.update_idletasks()
+            self.frames[name] = frame
+        return self.frames[name]
 
     def select_frame_by_name(self, name):
         """Switch and display the frame corresponding to the selected name."""
@@ -43,16 +84,17 @@ class App(ctk.CTk):
             frame.grid_forget()
 
         # Show the selected frame
-        if name in self.frames:
-            self.frames[name].grid(row=0, column=1, sticky="nsew")
+        if name in self.frame_builders:
+            self.get_frame(name).grid(row=0, column=1, sticky="nsew")
 
     def update_analysis_frame(self, data):
         """Callback to update the AnalysisFrame with new data."""
-        self.frames["analysis"].update_data(data)
+        self.get_frame("analysis").update_data(data)
         self.select_frame_by_name("analysis")
 
 if __name__ == "__main__":
-    app = App()
+    # Pass --startup-report to print how long each component took to appear
+    timer = StartupTimer(STARTED, enabled="--startup-report" in sys.argv)
+    timer.record("imports", time.perf_counter() - STARTED)
+    app = App(timer)
     app.mainloop()
-
-
@@ -1,6 +1,5 @@
 import customtkinter as ctk
-from PIL import Image
-import os
+from assets import get_image
 
 class NavigationFrame(ctk.CTkFrame):
     def __init__(self, parent, select_frame_callback):
@@ -11,18 +10,12 @@ class NavigationFrame(ctk.CTkFrame):
         self.grid_rowconfigure(5, weight=1)
         self.grid_rowconfigure(6, weight=0)
 
-        image_path = os.path.join(os.path.dirname(__file__), "test_images")
         self.images = {
-            "home": ctk.CTkImage(light_image=Image.open(os.path.join(image_path, "home_dark.png")),
-                                 dark_image=Image.open(os.path.join(image_path, "home_light.png")), size=(20, 20)),
-            "send_email": ctk.CTkImage(light_image=Image.open(os.path.join(image_path, "email_light.png")),
-                                       dark_image=Image.open(os.path.join(image_path, "email_dark.png")), size=(20, 20)),
-            "analysis": ctk.CTkImage(light_image=Image.open(os.path.join(image_path, "analytics_light.png")),
-                                     dark_image=Image.open(os.path.join(image_path, "analytics_dark.png")), size=(20, 20)),
-            "dashboard": ctk.CTkImage(light_image=Image.open(os.path.join(image_path, "dashboard_light.png")),
-                                       dark_image=Image.open(os.path.join(image_path, "dashboard_dark.png")), size=(20, 20)),
-            "logo": ctk.CTkImage(light_image=Image.open(os.path.join(image_path, "logo.png")),
-                                 dark_image=Image.open(os.path.join(image_path, "logo.png")), size=(150, 30))  # Adjust size as needed
+            "home": get_image("home_dark.png", "home_light.png", size=(20, 20)),
+            "send_email": get_image("email_light.png", "email_dark.png", size=(20, 20)),
+            "analysis": get_image("analytics_light.png", "analytics_dark.png", size=(20, 20)),
+            "dashboard": get_image("dashboard_light.png", "dashboard_dark.png", size=(20, 20)),
+            "logo": get_image("logo.png", size=(150, 30))  # Adjust size as needed
         }
 
         # Create navigation buttons
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+
+class InvertedIndex:
+    """Row positions of every category of a categorical column.
+
+    Positions are grouped by category code (missing values first), so the
+    rows of a set of categories are a few slices of one array.
+    """
+
+    def __init__(self, column):
+        self.categories = column.cat.categories
+        self.codes = column.cat.codes.to_numpy()  # -1 for missing values
+        self.order = np.argsort(self.codes, kind="stable")
+        # Rows of code c are order[offsets[c + 1]:offsets[c + 2]]
+        self.offsets = np.searchsorted(self.codes[self.order], np.arange(-1, len(self.categories) + 1))
+
+    def code(self, value):
+        """Return the code of a category value, or None if it does not occur."""
+        try:
+            return self.categories.get_loc(value)
+        except KeyError:
+            return None
+
+    def count(self, codes):
+        return int(sum(self.offsets[code + 2] - self.offsets[code + 1] for code in codes))
+
+    def positions(self, codes):
+        slices = [self.order[self.offsets[code + 1]:self.offsets[code + 2]] for code in codes]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.intp)
+
+    def contains(self, positions, codes):
+        """Return a mask of the `positions` whose value is one of `codes`."""
+        lookup = np.zeros(len(self.categories) + 1, dtype=bool)
+        lookup[np.asarray(codes, dtype=np.intp) + 1] = True
+        return lookup[self.codes[positions] + 1]
+
+
+class PrefixIndex:
+    """Case-insensitive prefix search over a categorical column's values.
+
+    Both the whole value and each of its words are indexed, so "smi"
+    finds "Alice Smith" as well as "alice" does.
+    """
+
+    def __init__(self, categories):
+        entries = sorted(
+            (word, code)
+            for code, value in enumerate(categories)
+            for word in {str(value).lower(), *str(value).lower().split()}
+        )
+        self.words = np.array([word for word, _ in entries], dtype=str)
+        self.codes = np.array([code for _, code in entries], dtype=np.intp)
+
+    def codes_for(self, prefix):
+        """Return the codes of the values with a word starting with `prefix`."""
+        prefix = prefix.strip().lower()
+        start = np.searchsorted(self.words, prefix, side="left")
+        stop = np.searchsorted(self.words, prefix + "\U0010ffff", side="left")
+        return np.unique(self.codes[start:stop])
+
+
+class SortedIndex:
+    """Row positions sorted by a numeric column, for range queries."""
+
+    def __init__(self, values):
+        self.values = values
+        valid = np.flatnonzero(~np.isnan(values))
+        self.order = valid[np.argsort(values[valid], kind="stable")]
+        self.sorted = values[self.order]
+
+    def bounds(self, low, high):
+        low = -np.inf if low is None else low
+        high = np.inf if high is None else high
+        return np.searchsorted(self.sorted, low, side="left"), np.searchsorted(self.sorted, high, side="right")
+
+    def count(self, low, high):
+        start, stop = self.bounds(low, high)
+        return int(stop - start)
+
+    def positions(self, low, high):
+        start, stop = self.bounds(low, high)
+        return self.order[start:stop]
+
+    def contains(self, positions, low, high):
+        values = self.values[positions]
+        low = -np.inf if low is None else low
+        high = np.inf if high is None else high
+        return (values >= low) & (values <= high)
+
+    def range_filter(self, low, high, wrap=False):
+        """Return (count, positions, contains) for `low <= value <= high`.
+
+        With `wrap`, a range whose low end is above its high end runs past the
+        largest value and starts again from the smallest (weeks 50 to 2).
+        """
+        if wrap and low is not None and high is not None and low > high:
+            return (
+                self.count(low, None) + self.count(None, high),
+                lambda: np.concatenate([self.positions(low, None), self.positions(None, high)]),
+                lambda positions: self.contains(positions, low, None) | self.contains(positions, None, high),
+            )
+        return (
+            self.count(low, high),
+            lambda: self.positions(low, high),
+            lambda positions: self.contains(positions, low, high),
+        )
+
+
+class RecordIndex:
+    """Indexes over the typed absence records backing the Analysis filter bar.
+
+    Name and Manager get prefix search plus an inverted index, Category an
+    inverted index, the week number and the ISO year-week of the absence
+    sorted indexes for ranges, and rows without a Date of Response a mask. `search()` starts from the filter matching the
+    fewest rows and checks the others on those candidates only, so a query
+    costs the size of its smallest filter rather than of the data.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.inverted = {}
+        self.prefixes = {}
+        for column in ["Name", "Manager", "Category"]:
+            self.build(column)
+        self.build("Week")
+        self.build("Dates of Absences")
+        self.unanswered = data["Date of Response"].isna().to_numpy(copy=True)
+        self.stale = set()
+
+    def build(self, column):
+        if column == "Week":
+            self.weeks = SortedIndex(self.data["Week"].to_numpy(dtype=float, na_value=np.nan))
+            return
+        if column == "Dates of Absences":
+            # ISO year * 100 + week, so ranges can cross the turn of the year
+            iso = self.data["Dates of Absences"].dt.isocalendar()
+            keys = iso["year"].astype("Float64") * 100 + iso["week"].astype("Float64")
+            self.iso_weeks = SortedIndex(keys.to_numpy(dtype=float, na_value=np.nan))
+            return
+        self.inverted[column] = InvertedIndex(self.data[column])
+        if column in ("Name", "Manager"):
+            self.prefixes[column] = PrefixIndex(self.inverted[column].categories)
+
+    def update(self, position, columns):
+        """Account for edits to one row: the response mask is updated in place,
+        other edited columns are re-indexed on the next search."""
+        if "Date of Response" in columns:
+            self.unanswered[position] = pd.isna(self.data["Date of Response"].iat[position])
+        self.stale.update(set(columns) & {"Name", "Manager", "Category", "Week", "Dates of Absences"})
+
+    def category_filter(self, column, codes):
+        index = self.inverted[column]
+        return index.count(codes), lambda: index.positions(codes), lambda positions: index.contains(positions, codes)
+
+    def search(self, name="", manager="", category=None, week_from=None, week_to=None, unanswered=False):
+        """Return the ascending positions of the rows matching every given filter, or None if none is set.
+
+        A week bound is either a week number, matched in any year (from 50 to 2
+        wraps over the new year), or a (year, week) pair matched on the ISO week
+        of the absence date.
+        """
+        for column in self.stale:
+            self.build(column)
+        self.stale = set()
+
+        filters = []
+        for column, prefix in [("Name", name), ("Manager", manager)]:
+            if prefix.strip():
+                filters.append(self.category_filter(column, self.prefixes[column].codes_for(prefix)))
+        if category:
+            code = self.inverted["Category"].code(category)
+            filters.append(self.category_filter("Category", [] if code is None else [code]))
+        numbers = [bound if isinstance(bound, int) else None for bound in (week_from, week_to)]
+        keys = [bound[0] * 100 + bound[1] if isinstance(bound, tuple) else None for bound in (week_from, week_to)]
+        if numbers != [None, None]:
+            filters.append(self.weeks.range_filter(*numbers, wrap=True))
+        if keys != [None, None]:
+            filters.append(self.iso_weeks.range_filter(*keys))
+        if unanswered:
+            filters.append((
+                int(self.unanswered.sum()),
+                lambda: np.flatnonzero(self.unanswered),
+                lambda positions: self.unanswered[positions],
+            ))
+        if not filters:
+            return None
+
+        filters.sort(key=lambda f: f[0])
+        positions = np.sort(filters[0][1]())
+        for _, _, contains in filters[1:]:
+            positions = positions[contains(positions)]
+        return positions
@@ -0,0 +1,192 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+from absence_schema import parse_dates
+from excel_ingest import read_workbooks
+from mail_transport import SendCancelled
+
+
+def add_week_column(data):
+    """Add the ISO week of each absence date as a nullable integer column."""
+    dates = parse_dates(data["Dates of Absences"])
+    data["Week"] = dates.dt.isocalendar().week.astype("Int64")
+    return data
+
+
+# Placeholders available to the subject and body templates, with sample values
+TEMPLATE_FIELDS = {"name": "Name", "dates": "2024-01-01"}
+
+
+def check_template(template, label):
+    """Raise ValueError naming the problem if `template` cannot be rendered for a row."""
+    try:
+        template.format(**TEMPLATE_FIELDS)
+    except KeyError as e:
+        placeholders = ", ".join(f"{{{field}}}" for field in TEMPLATE_FIELDS)
+        raise ValueError(f"Unknown placeholder {{{e.args[0]}}} in the {label}; use {placeholders}.") from None
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Invalid {label}: {e}") from None
+
+
+def render_messages(data, subject_template, body_template):
+    """Render the recipients, subject and body of every row before sending starts."""
+    fields = list(zip(data["Name"].tolist(), data["Dates of Absences"].tolist()))
+    return pd.DataFrame({
+        "to": data["Email Name"].to_numpy(),
+        "cc": data["Email Manager"].to_numpy(),
+        "subject": [subject_template.format(name=name, dates=dates) for name, dates in fields],
+        "body": [body_template.format(name=name, dates=dates) for name, dates in fields],
+    })
+
+
+def render_digests(data, subject_template, body_template):
+    """Render one message per employee/manager pair listing all of its dates.
+
+    Returns the messages and, for every row of `data`, the position of the
+    message that covers it. Each message lists its dates once, in date order.
+    """
+    keys = ["Email Name", "Email Manager"]
+    row_message = data.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    dates = parse_dates(data["Dates of Absences"])
+    # Readable dates are written the same way so repeats in other formats collapse too
+    date_text = dates.dt.strftime("%Y-%m-%d").fillna(data["Dates of Absences"].astype(str))
+    digests = (
+        data[keys + ["Name"]]
+        .assign(message=row_message, date=dates, **{"Dates of Absences": date_text})
+        .sort_values(["message", "date"], kind="stable")
+        .drop_duplicates(["message", "Dates of Absences"])
+        .groupby("message")
+        .agg({"Email Name": "first", "Email Manager": "first", "Name": "first", "Dates of Absences": ", ".join})
+    )
+    return render_messages(digests, subject_template, body_template), row_message
+
+
+class SendJob:
+    """Send one batch of emails in the background.
+
+    The job reads the workbooks (one path or a list, every sheet, parsed in
+    parallel by excel_ingest.py), renders every message up front and sends them
+    through `transport` (see mail_transport.py) on a pool of worker threads.
+    Send results are collected in an array and merged into the data once the
+    batch is over. With `digest` set, each employee gets a single email
+    listing all of their dates instead of one email per row. Nothing here touches
+    Tk: progress, per-recipient results and the final data are put on
+    `events` as tuples for the UI thread to poll:
+
+        ("log", message)
+        ("progress", done, total)
+        ("done", data)  # data is None if the batch could not be started
+    """
+
+    def __init__(self, file_paths, subject, body_template, transport, concurrency=4, digest=False):
+        self.file_paths = [file_paths] if isinstance(file_paths, str) else list(file_paths)
+        self.transport = transport
+        self.subject = subject
+        self.body_template = body_template
+        self.concurrency = max(1, int(concurrency))
+        self.digest = digest
+        self.events = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        """Stop sending; messages already handed to the transport are not recalled."""
+        self.cancelled.set()
+        self.transport.cancel()
+
+    def log(self, message):
+        self.events.put(("log", message))
+
+    def run(self):
+        data = None
+        try:
+            data = self.prepare()
+            if data is not None:
+                self.send_all(data)
+        except Exception as e:
+            self.log(f">> Sending failed: {str(e)}")
+        finally:
+            self.transport.close()
+            self.events.put(("done", data))
+
+    def prepare(self):
+        """Check the templates and read the workbooks, returning None if there is nothing to send."""
+        try:
+            check_template(self.subject, "subject")
+            check_template(self.body_template, "body")
+        except ValueError as e:
+            self.log(f">> Template error: {str(e)}")
+            return None
+
+        try:
+            data = read_workbooks(self.file_paths, self.log)
+        except Exception as e:
+            self.log(f">> Error reading Excel file: {str(e)}")
+            return None
+        if data is None:
+            self.log(">> No sheet with the required columns was found.")
+            return None
+
+        # Calculate the Week based on "Dates of Absences"
+        return add_week_column(data)
+
+    def send_all(self, data):
+        # Capture the date when emails are sent
+        date_of_send = datetime.now().strftime("%Y-%m-%d")
+        if self.digest:
+            messages, row_message = render_digests(data, self.subject, self.body_template)
+        else:
+            messages = render_messages(data, self.subject, self.body_template)
+            row_message = np.arange(len(data))
+        recipients = messages["to"].tolist()
+        total = len(messages)
+        sent = np.zeros(total, dtype=bool)
+        done = 0
+        failed = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(self.send_one, to, cc, subject, body): position
+                for position, (to, cc, subject, body) in enumerate(messages.itertuples(index=False, name=None))
+            }
+            for future in as_completed(futures):
+                position = futures[future]
+                try:
+                    sent[position] = future.result()
+                    if sent[position]:
+                        self.log(f">> Email sent to {recipients[position]}.")
+                except Exception as e:
+                    self.log(f">> Failed to send email to {recipients[position]}: {str(e)}")
+                    failed += 1
+                done += 1
+                self.events.put(("progress", done, total))
+
+        # Update the data with the sent date in one pass, only on the rows whose message went out
+        data.loc[sent[row_message], "Date of Send"] = date_of_send
+
+        # Messages skipped after a cancel finish without being sent or failing
+        elapsed = time.perf_counter() - started
+        sent_count = int(sent.sum())
+        skipped = done - sent_count - failed
+        if self.cancelled.is_set():
+            self.log(f">> Sending cancelled: {skipped} of {total} emails skipped.")
+        if failed:
+            self.log(f">> {failed} emails failed.")
+        self.log(f">> {sent_count} emails sent via {self.transport.name} in {elapsed:.1f} s ({sent_count / max(elapsed, 1e-9):.1f}/s).")
+
+    def send_one(self, to, cc, subject, body):
+        """Send one rendered email; returns False if the job was cancelled."""
+        if self.cancelled.is_set():
+            return False
+        try:
+            self.transport.send(to, cc, subject, body)
+        except SendCancelled:
+            return False
+        return True
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+import time
+
+
+class StartupTimer:
+    """Record how long each startup step takes and print a short report.
+
+    Steps measured before `report()` are printed together once the window
+    has been painted; steps measured afterwards (pages built on first
+    navigation) are printed as they finish.
+    """
+
+    def __init__(self, started=None, enabled=True):
+        self.started = time.perf_counter() if started is None else started
+        self.enabled = enabled
+        self.steps = []
+        self.reported = False
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        step = (name, seconds, time.perf_counter() - self.started)
+        self.steps.append(step)
+        if self.enabled and self.reported:
+            print(self.format_step(step))
+
+    def format_step(self, step):
+        name, seconds, elapsed = step
+        return f"{name:<24}{seconds * 1000:9.1f} ms   (t = {elapsed * 1000:8.1f} ms)"
+
+    def report(self, title="Startup timing"):
+        self.reported = True
+        if self.enabled:
+            print(title)
+            for step in self.steps:
+                print(self.format_step(step))
@@ -0,0 +1,111 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from absence_schema import CATEGORY_MAPPING, COLUMNS
+
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Evan", "Fatima", "Hamza", "Ines", "Julien", "Karim",
+               "Laura", "Mohamed", "Nadia", "Olivier", "Pauline", "Rachid", "Sophie", "Thomas", "Yasmine", "Zoe"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Prince", "Williams", "Martin", "Bernard", "Dubois", "Talbi",
+              "Tebbai", "Moreau", "Laurent", "Simon", "Michel", "Lefebvre", "Leroy", "Roux", "Fournier"]
+JUSTIFICATIVES = list(CATEGORY_MAPPING)
+
+
+def people(count, random, domain, offset=0):
+    """Return `count` distinct names and emails, skipping the first `offset` names."""
+    index = np.arange(offset, offset + count)
+    first = np.array(FIRST_NAMES)[index % len(FIRST_NAMES)]
+    last = np.array(LAST_NAMES)[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    suffix = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    order = random.permutation(count)
+    names = [f"{f} {l}" + (f" {s + 1}" if s else "") for f, l, s in zip(first[order], last[order], suffix[order])]
+    emails = [name.lower().replace(" ", ".") + f"@{domain}" for name in names]
+    return names, emails
+
+
+def generate_new_absences(rows, seed=0, start="2024-01-01", days=365):
+    """Absences in the layout of test_absences.xlsx: one row per employee and missed day.
+
+    About one employee per 20 rows and one manager per 8 employees, so
+    names repeat the way they do in the real exports.
+    """
+    random = np.random.default_rng(seed)
+    employee_count = max(1, rows // 20)
+    manager_count = max(1, employee_count // 8)
+    names, emails = people(employee_count, random, "example.com")
+    manager_names, manager_emails = people(manager_count, random, "company.com", offset=employee_count)
+    employee_manager = random.integers(0, manager_count, employee_count)
+
+    employee = random.integers(0, employee_count, rows)
+    manager = employee_manager[employee]
+    dates = pd.Timestamp(start) + pd.to_timedelta(random.integers(0, days, rows), unit="D")
+    return pd.DataFrame({
+        "Dates of Absences": dates.strftime("%Y-%m-%d"),
+        "Name": np.array(names, dtype=object)[employee],
+        "Email Name": np.array(emails, dtype=object)[employee],
+        "Manager": np.array(manager_names, dtype=object)[manager],
+        "Email Manager": np.array(manager_emails, dtype=object)[manager],
+    })
+
+
+def generate_absences(rows, seed=0, response_rate=0.7):
+    """History in the layout of saved_data.csv: sent emails, some answered and categorized."""
+    random = np.random.default_rng(seed + 1)
+    data = generate_new_absences(rows, seed)
+    dates = pd.to_datetime(data["Dates of Absences"])
+    sent = dates + pd.to_timedelta(random.integers(1, 4, rows), unit="D")
+    answered = random.random(rows) < response_rate
+    response = (sent + pd.to_timedelta(random.integers(0, 8, rows), unit="D")).where(answered)
+    justificative = pd.Series(np.array(JUSTIFICATIVES, dtype=object)[random.integers(0, len(JUSTIFICATIVES), rows)])
+    justificative = justificative.where(answered)
+
+    data["Week"] = dates.dt.isocalendar().week.astype(int).to_numpy()
+    data["Date of Send"] = sent.dt.strftime("%Y-%m-%d")
+    data["Date of Response"] = response.dt.strftime("%Y-%m-%d")
+    data["Justificative"] = justificative
+    data["Category"] = justificative.map(CATEGORY_MAPPING)
+    return data[COLUMNS]
+
+
+def generate_kpis(rows, seed=0):
+    """Weekly KPI rows in the layout of saved_data.xlsx (WEEK as 'S<n>', rates as percentages)."""
+    random = np.random.default_rng(seed + 2)
+    planned = random.integers(100, 300, rows)
+    unplanned = random.integers(40, 160, rows)
+    absent = random.integers(10, 80, rows)
+    return pd.DataFrame({
+        "WEEK": [f"S{week}" for week in (np.arange(rows)[::-1] % 52 + 1)],
+        "Unplanned presence": [f"{rate:.2f}%" for rate in random.uniform(5, 90, rows)],
+        "absence": [f"{rate:.2f}%" for rate in absent / (planned + unplanned) * 100],
+        "Pplanifie": planned,
+        "Npplanifie": unplanned,
+        "NB ABSENT": absent,
+    })
+
+
+def write_dataset(directory, rows, seed=0):
+    """Write saved_data.csv, test_absences.xlsx and saved_data.xlsx (KPIs) with `rows` rows each."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "history": os.path.join(directory, "saved_data.csv"),
+        "new": os.path.join(directory, "test_absences.xlsx"),
+        "kpis": os.path.join(directory, "saved_data.xlsx"),
+    }
+    generate_absences(rows, seed).to_csv(paths["history"], index=False)
+    # A different seed so the new batch is not a copy of the history
+    generate_new_absences(rows, seed + 100).to_excel(paths["new"], index=False)
+    generate_kpis(rows, seed).to_excel(paths["kpis"], index=False)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic absence and KPI files")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--out", default="bench_data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        directory = os.path.join(args.out, f"{rows}")
+        write_dataset(directory, rows, args.seed)
+        print(f"{rows:>9,} rows -> {directory}")
@@ -0,0 +1,208 @@
+from tkinter import ttk
+import numpy as np
+
+
+class VirtualTable:
+    """Treeview that only materializes the visible window of a DataFrame.
+
+    A fixed pool of items is created once and their values are rewritten as
+    the user scrolls, so drawing the table costs the number of visible rows
+    rather than the number of rows in the data. Rows just outside the window
+    are kept in a small cache so short scrolls do not go back to the DataFrame.
+
+    The table can show a subset of the rows, given as an array of DataFrame
+    positions; scrolling and selection then work on positions in that view.
+    """
+
+    def __init__(self, parent, height=10, buffer=20):
+        self.tree = ttk.Treeview(parent, columns=(), show="headings", height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+
+        self.data = None
+        self.positions = None  # DataFrame positions of the shown rows, None for all rows
+        self.visible_rows = height
+        self.buffer = buffer
+        self.first = 0  # view position shown in the top item
+        self.selected = None  # view position of the selected row
+        self.row_cache = {}  # view position -> displayed values
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.move_selection(self.visible_rows))
+
+    def set_data(self, data, positions=None):
+        """Show a new DataFrame (or the rows at `positions`), keeping the scroll position when possible.
+
+        The selection follows its record by index label, since new rows can
+        shift every position.
+        """
+        selected_key = None
+        if self.selected is not None and self.data is not None:
+            selected_key = self.data.index[self.data_position(self.selected)]
+        self.data = data
+        self.positions = positions
+        self.row_cache = {}
+
+        columns = list(data.columns)
+        if list(self.tree["columns"]) != columns:
+            self.tree["columns"] = columns
+            for col in columns:
+                self.tree.heading(col, text=col)
+                self.tree.column(col, width=120, anchor="center")
+
+        self.selected = None
+        if selected_key is not None and data.index.is_unique and selected_key in data.index:
+            self.selected = self.view_position(data.index.get_loc(selected_key))
+        self.first = self.clamp(self.first)
+        self.render()
+
+    def set_view(self, positions):
+        """Show only the rows at `positions` (None for all rows), starting from the top."""
+        self.positions = positions
+        self.row_cache = {}
+        self.first = 0
+        self.selected = None
+        self.render()
+
+    def data_position(self, position):
+        """Return the DataFrame position of a view position."""
+        return position if self.positions is None else int(self.positions[position])
+
+    def view_position(self, data_position):
+        """Return the view position of a DataFrame position, or None if it is filtered out."""
+        if self.positions is None:
+            return data_position
+        position = int(np.searchsorted(self.positions, data_position))
+        if position < len(self.positions) and self.positions[position] == data_position:
+            return position
+        return None
+
+    def refresh_row(self, position):
+        """Redraw a single row after its values changed in the DataFrame."""
+        self.row_cache.pop(position, None)
+        iid = self.iid_for(position)
+        if iid is not None:
+            self.tree.item(iid, values=self.row_values(position))
+
+    def selected_position(self):
+        """Return the view position of the selected row, or None."""
+        return self.selected
+
+    def total_rows(self):
+        if self.data is None:
+            return 0
+        return len(self.data) if self.positions is None else len(self.positions)
+
+    def slot_iid(self, slot):
+        return f"slot{slot}"
+
+    def iid_for(self, position):
+        """Return the item currently showing a view position, or None if off screen."""
+        slot = position - self.first
+        if 0 <= slot < len(self.tree.get_children()):
+            return self.slot_iid(slot)
+        return None
+
+    def clamp(self, first):
+        return max(0, min(first, self.total_rows() - self.visible_rows))
+
+    def row_values(self, position):
+        """Return display values for a row, filling the cache around it."""
+        if position not in self.row_cache:
+            # Drop cached rows far from the window, then fetch a whole chunk at once
+            low, high = self.first - self.buffer, self.first + self.visible_rows + self.buffer
+            self.row_cache = {pos: values for pos, values in self.row_cache.items() if low <= pos < high}
+
+            start = max(0, min(position, low))
+            stop = min(self.total_rows(), max(position + 1, high))
+            chunk = self.data.iloc[start:stop] if self.positions is None else self.data.iloc[self.positions[start:stop]]
+            # Dates are shown without a time of day
+            dates = chunk.select_dtypes("datetime").columns
+            chunk = chunk.assign(**{col: chunk[col].dt.strftime("%Y-%m-%d") for col in dates}).astype(object)
+            chunk = chunk.where(chunk.notna(), "")
+            for offset, values in enumerate(chunk.to_numpy().tolist()):
+                self.row_cache[start + offset] = values
+        return self.row_cache[position]
+
+    def render(self):
+        """Rewrite the item pool with the rows of the current window."""
+        count = min(self.visible_rows, self.total_rows() - self.first)
+        slots = self.tree.get_children()
+
+        # Grow or shrink the item pool to the number of rows on screen
+        for slot in range(len(slots), count):
+            self.tree.insert("", "end", iid=self.slot_iid(slot))
+        if len(slots) > count:
+            self.tree.delete(*slots[count:])
+
+        for slot in range(count):
+            self.tree.item(self.slot_iid(slot), values=self.row_values(self.first + slot))
+
+        # Keep the selection attached to the data row, not to the recycled item
+        if self.selected is not None and 0 <= self.selected - self.first < count:
+            iid = self.slot_iid(self.selected - self.first)
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        else:
+            self.tree.selection_set(())
+
+        total = self.total_rows()
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, first):
+        first = self.clamp(first)
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: handle 'moveto' and 'scroll' requests."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total_rows()))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def on_resize(self, event):
+        """Adjust the item pool to the number of rows that fit in the widget."""
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or 20
+        # One row worth of height is taken by the column headings
+        rows = max(1, event.height // int(row_height) - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.first = self.clamp(self.first)
+            self.render()
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self.selected = self.first + self.tree.index(selection[0])
+
+    def move_selection(self, rows):
+        """Move the selection with the keyboard, scrolling at the window edges."""
+        if not self.total_rows():
+            return "break"
+        position = self.first if self.selected is None else self.selected + rows
+        self.selected = max(0, min(position, self.total_rows() - 1))
+        if self.selected < self.first:
+            self.first = self.selected
+        elif self.selected >= self.first + self.visible_rows:
+            self.first = self.clamp(self.selected - self.visible_rows + 1)
+        self.render()
+        return "break"
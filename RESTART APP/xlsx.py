@@ -1,36 +1,59 @@
+import argparse
 import customtkinter as ctk
-import pandas as pd
-import random
+from collections import deque
 import time
 from threading import Thread
 import tkinter.messagebox as messagebox
+from can_anomaly import AnomalyEngine, reason_text
+from can_buffer import CANRingBuffer, SIGNAL_NAMES
+from can_source import SOURCES, SimulatorSource, create_source
+from can_writer import SegmentWriter
 
 # Initialize app theme
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
 class CANLoggerApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, capacity=100_000, log_format="csv", source=None):
         super().__init__()
         self.title("CAN Diagnostic Logger")
         self.geometry("600x400")
 
-        # Data storage
-        self.data = []
-        self.file_name = "can_data.csv"
+        # Data storage: fixed-size ring buffer holding the last `capacity` frames
+        self.data = CANRingBuffer(capacity)
+        self.log_dir = "can_logs"
+        self.log_format = log_format
+        self.writer = None
+
+        # Windowed anomaly rules, evaluated on each batch before it is stored
+        self.anomalies = AnomalyEngine()
+
+        # Batches and their anomaly reasons from the ingest thread, rendered by the Tk thread
+        self.refresh_ms = 1000 // 30  # ~30 table refreshes per second
+        self.max_lines = 500  # lines kept in the table
+        self.display_queue = deque(maxlen=self.max_lines)
+        self.stats_ms = 1000
+        self.stats_due = 0
 
         # UI Components
         self.setup_ui()
+        self.refresh_job = self.after(self.refresh_ms, self.refresh_table)
 
-        # Start CAN simulation in a background thread
+        # Frames come from the simulator unless another source is given
+        self.source = source or SimulatorSource()
         self.running = True
-        Thread(target=self.simulate_can_messages, daemon=True).start()
+        self.source.start()
+        Thread(target=self.ingest, daemon=True).start()
 
     def setup_ui(self):
         # Table for displaying CAN data
         self.table = ctk.CTkTextbox(self, width=500, height=250)
         self.table.pack(pady=10)
 
+        # Ingest rate and drop counters of the source and the logging pipeline
+        self.stats_label = ctk.CTkLabel(self, text="")
+        self.stats_label.pack(pady=0)
+
         # Start/Stop button
         self.start_button = ctk.CTkButton(self, text="Start Logging", command=self.start_logging)
         self.start_button.pack(pady=5)
@@ -38,41 +61,96 @@ class CANLoggerApp(ctk.CTk):
         self.stop_button = ctk.CTkButton(self, text="Stop Logging", command=self.stop_logging)
         self.stop_button.pack(pady=5)
 
-    def simulate_can_messages(self):
-        can_ids = {
-            "0x100": "Engine Speed",
-            "0x101": "Temperature",
-            "0x102": "Vehicle Speed"
-        }
-        thresholds = {"Engine Speed": 4000, "Temperature": 100, "Vehicle Speed": 120}
-
+    def ingest(self):
+        """Check each batch from the source for anomalies and store it."""
         while self.running:
-            for can_id, signal_name in can_ids.items():
-                value = random.randint(0, 5000) if "Speed" in signal_name else random.randint(0, 120)
-                timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-
-                # Check for anomalies
-                warning = value > thresholds.get(signal_name, float('inf'))
-                entry = f"{timestamp} | {can_id} | {signal_name} | {value} {'(Warning!)' if warning else ''}\n"
-
-                # Update table
-                self.table.insert("0.0", entry)
-
-                # Log to data
-                self.data.append({"Timestamp": timestamp, "CAN ID": can_id, "Signal": signal_name, "Value": value, "Warning": warning})
-                time.sleep(0.5)
+            frames = self.source.get()
+            if frames is None:
+                continue
+
+            # Check for anomalies
+            reasons = self.anomalies.evaluate(frames)
+
+            # Log to data
+            self.data.extend(frames)
+
+            # Hand the batch to the Tk thread; widgets must not be touched from here
+            self.display_queue.append((frames[-self.max_lines:], reasons[-self.max_lines:]))
+
+    def format_lines(self, frames, reasons):
+        lines = []
+        for (timestamp_ns, can_id, signal, value, warning), reason in zip(frames.tolist(), reasons.tolist()):
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp_ns / 1e9))
+            flag = f"(Warning: {reason_text(reason)})" if warning else ""
+            lines.append(f"{timestamp} | 0x{can_id:X} | {SIGNAL_NAMES[signal]} | {value:g} {flag}\n")
+        return lines
+
+    def refresh_table(self):
+        """Render queued batches at once, newest on top, formatting only the last `max_lines` frames."""
+        batches = []
+        while self.display_queue:
+            batches.append(self.display_queue.popleft())
+
+        # Newest batches first, stopping once the table is full
+        text = []
+        remaining = self.max_lines
+        for frames, reasons in reversed(batches):
+            if remaining <= 0:
+                break
+            text.extend(reversed(self.format_lines(frames[-remaining:], reasons[-remaining:])))
+            remaining -= len(frames[-remaining:])
+        if text:
+            self.table.insert("0.0", "".join(text))
+            self.table.delete(f"{self.max_lines + 1}.0", "end")
+
+        if time.monotonic() >= self.stats_due:
+            self.stats_due = time.monotonic() + self.stats_ms / 1000
+            self.update_stats()
+        self.refresh_job = self.after(self.refresh_ms, self.refresh_table)
+
+    def update_stats(self):
+        stats = self.source.stats()
+        text = (f"{self.source.name}: {stats['rate']:,.0f} frames/s, {stats['received']:,} received, "
+                f"{stats['dropped']:,} dropped")
+        if self.writer is not None:
+            text += f" | log: {self.writer.written:,} written, {self.writer.dropped:,} dropped"
+        self.stats_label.configure(text=text)
 
     def start_logging(self):
-        # Save to CSV
-        if self.data:
-            df = pd.DataFrame(self.data)
-            df.to_csv(self.file_name, index=False)
-            messagebox.showinfo(title="Logging Saved", message=f"Data logged to {self.file_name}")
+        # Stream everything still in the buffer, then every new frame, to rotating segment files
+        if self.writer is None:
+            self.writer = SegmentWriter(self.data, self.log_dir, self.log_format)
+            self.writer.start()
+            self.start_button.configure(state="disabled", text="Logging...")
+            messagebox.showinfo(title="Logging Started", message=f"Data is being logged to {self.log_dir}/")
 
     def stop_logging(self):
         self.running = False
+        self.source.stop()
+        self.after_cancel(self.refresh_job)
+        if self.writer is not None:
+            self.writer.stop()
         self.destroy()
 
 if __name__ == "__main__":
-    app = CANLoggerApp()
+    parser = argparse.ArgumentParser(description="CAN Diagnostic Logger")
+    parser.add_argument("--source", choices=SOURCES, default="simulator")
+    parser.add_argument("--rate", type=float, default=2.0, help="simulator frames per second")
+    parser.add_argument("--replay", default="can_data.csv", help="CSV export, segment file or segment directory")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--loop", action="store_true", help="restart the replay when it ends")
+    parser.add_argument("--channel", default="vcan0")
+    parser.add_argument("--interface", default="socketcan", help="python-can interface, e.g. socketcan or virtual")
+    parser.add_argument("--capacity", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "bin"], default="csv")
+    args = parser.parse_args()
+
+    if args.source == "simulator":
+        source = create_source("simulator", rate=args.rate)
+    elif args.source == "replay":
+        source = create_source("replay", path=args.replay, speed=args.speed or None, loop=args.loop)
+    else:
+        source = create_source("python-can", channel=args.channel, interface=args.interface)
+
+    app = CANLoggerApp(args.capacity, args.format, source)
     app.mainloop()